@@ -39,14 +39,20 @@ import json
 import time
 import asyncio
 import logging
+import logging.handlers
+import queue
+import re
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple, Union
+from typing import Dict, List, Optional, Any, Tuple, Union, Iterable, Set, Callable
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, asdict, fields, replace
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
 from functools import lru_cache, wraps
 import hashlib
-import pickle
+import struct
+import threading
+import atexit
 
 try:
     import psutil
@@ -56,6 +62,64 @@ except ImportError:
     MONITORING_AVAILABLE = False
     print("[WARN] HeadyBrain: psutil/requests not available, limited functionality")
 
+# Cache entries use msgpack when installed; compact JSON is always available
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(verbose: Optional[bool] = None) -> logging.Logger:
+    """
+    Give the shared HeadyBrain logger a stderr handler and a level. Meant for
+    CLI entry points: applications that configure logging themselves need not
+    call it, and nothing calls it on import or construction. Records are formatted and written by a background listener
+    thread, so request threads only enqueue. Pipeline progress is logged at
+    INFO and emitted only when verbose (default: HEADY_BRAIN_VERBOSE).
+    Records still propagate to the host's handlers.
+    """
+    global _log_listener
+    logger = logging.getLogger("HeadyBrain")
+    if _log_listener is None:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        ))
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+        _log_listener = logging.handlers.QueueListener(log_queue, handler)
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    if verbose is None:
+        verbose = os.getenv("HEADY_BRAIN_VERBOSE", "") not in ("", "0")
+    logger.setLevel(logging.INFO if verbose else logging.WARNING)
+    return logger
+
+
+class BrainLogger(logging.LoggerAdapter):
+    """
+    The shared HeadyBrain logger seen through one instance's verbosity:
+    verbose False silences that instance's INFO progress without touching
+    the logger; True or None leave it to the logger's level. Warnings
+    always pass through.
+    """
+    
+    def __init__(self, logger: logging.Logger, verbose: Optional[bool] = None):
+        super().__init__(logger, {})
+        self.verbose = verbose
+    
+    def isEnabledFor(self, level: int) -> bool:
+        if self.verbose is False and level < logging.WARNING:
+            return False
+        return self.logger.isEnabledFor(level)
+    
+    def log(self, level: int, msg, *args, **kwargs):
+        if self.isEnabledFor(level):
+            self.logger.log(level, msg, *args, **kwargs)
+
 
 @dataclass
 class ProcessingContext:
@@ -85,6 +149,12 @@ class ProcessingContext:
     processing_time: float = 0.0
     cache_hit: bool = False
     confidence_score: float = 0.0
+    
+    # Stages that overran their budget or failed and used a fallback result
+    degraded: Tuple[str, ...] = ()
+    
+    # Served from cache past its TTL while a refresh runs in the background
+    stale: bool = False
 
 
 def performance_monitor(func):
@@ -98,7 +168,7 @@ def performance_monitor(func):
             
             # Log performance if available
             if hasattr(self, 'logger'):
-                self.logger.info(f"{func.__name__} completed in {processing_time:.3f}s")
+                self.logger.info("%s completed in %.3fs", func.__name__, processing_time)
             
             # Add timing to result if it's a ProcessingContext
             if hasattr(result, 'processing_time'):
@@ -108,11 +178,630 @@ def performance_monitor(func):
         except Exception as e:
             processing_time = time.time() - start_time
             if hasattr(self, 'logger'):
-                self.logger.error(f"{func.__name__} failed after {processing_time:.3f}s: {e}")
+                self.logger.error("%s failed after %.3fs: %s", func.__name__, processing_time, e)
             raise
     return wrapper
 
 
+class CacheSerializer:
+    """
+    Versioned, checksummed encoding for cache entries (JSON-compatible dicts).
+    Layout: magic, format version, codec id, 8-byte blake2b of the body, body.
+    Decoding never executes code, so cache files can be shared between
+    processes and Python versions; damaged or foreign files raise ValueError.
+    """
+    
+    MAGIC = b"HBC"
+    VERSION = 1
+    HEADER = struct.Struct(">3sBB8s")
+    
+    # codec id -> (name, encode, decode); values the codec cannot represent become strings
+    CODECS = {
+        1: ("json",
+            lambda obj: json.dumps(obj, separators=(",", ":"), default=str).encode(),
+            lambda body: json.loads(body)),
+    }
+    if MSGPACK_AVAILABLE:
+        CODECS[2] = ("msgpack",
+                     lambda obj: msgpack.packb(obj, default=str, use_bin_type=True),
+                     lambda body: msgpack.unpackb(body, raw=False))
+    
+    def __init__(self, codec: Optional[str] = None):
+        names = {name: codec_id for codec_id, (name, _, _) in self.CODECS.items()}
+        if codec is None:
+            codec = "msgpack" if "msgpack" in names else "json"
+        if codec not in names:
+            raise ValueError(f"Unknown cache codec: {codec}")
+        self.codec = codec
+        self._codec_id = names[codec]
+    
+    @staticmethod
+    def _checksum(body: bytes) -> bytes:
+        return hashlib.blake2b(body, digest_size=8).digest()
+    
+    def dumps(self, obj: Dict[str, Any]) -> bytes:
+        body = self.CODECS[self._codec_id][1](obj)
+        return self.HEADER.pack(self.MAGIC, self.VERSION, self._codec_id, self._checksum(body)) + body
+    
+    def loads(self, data: bytes) -> Dict[str, Any]:
+        """Decode any supported codec, whichever one this instance writes."""
+        if len(data) < self.HEADER.size:
+            raise ValueError("Truncated cache entry")
+        magic, version, codec_id, checksum = self.HEADER.unpack_from(data)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError("Not a cache entry of this format version")
+        if codec_id not in self.CODECS:
+            raise ValueError(f"Unsupported cache codec id {codec_id}")
+        body = data[self.HEADER.size:]
+        if self._checksum(body) != checksum:
+            raise ValueError("Cache entry checksum mismatch")
+        return self.CODECS[codec_id][2](body)
+
+
+class ContextCache:
+    """
+    Two-tier cache for processed contexts.
+    An in-memory LRU bounded by entry count and bytes serves hot requests;
+    behind it, serialized files sharded into subdirectories by key prefix are
+    evicted oldest-first once the directory exceeds disk_max_bytes.
+    Entries past their TTL can still be served as stale for a grace window.
+    """
+    
+    # Legacy pickle files are never loaded, only evicted and cleared
+    SUFFIXES = (".hbc", ".pkl")
+    
+    def __init__(self, cache_dir: Path, max_entries: int = 256,
+                 max_bytes: int = 32 * 1024 * 1024, disk_max_bytes: int = 256 * 1024 * 1024,
+                 serializer: Optional[CacheSerializer] = None):
+        self.cache_dir = Path(cache_dir)
+        self.serializer = serializer or CacheSerializer()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        
+        # key -> (saved_at epoch, context, serialized size)
+        self._memory: "OrderedDict[str, Tuple[float, ProcessingContext, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes: Optional[int] = None  # measured on first write
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "stale_hits": 0, "misses": 0,
+                      "memory_evictions": 0, "disk_evictions": 0}
+    
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.hbc"
+    
+    def get(self, key: str, ttl_seconds: float) -> Optional[ProcessingContext]:
+        """Cached context for key if younger than ttl_seconds (RAM first, then disk)."""
+        return self.lookup(key, ttl_seconds)[0]
+    
+    def lookup(self, key: str, ttl_seconds: float,
+               max_stale_seconds: float = 0.0) -> Tuple[Optional[ProcessingContext], bool]:
+        """
+        (context, stale) for key. Entries younger than ttl_seconds are fresh;
+        up to max_stale_seconds past it they are returned with stale=True.
+        """
+        now = time.time()
+        limit = ttl_seconds + max_stale_seconds
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                age = now - cached[0]
+                if age < limit:
+                    self._memory.move_to_end(key)
+                    stale = age >= ttl_seconds
+                    self.stats["stale_hits" if stale else "memory_hits"] += 1
+                    return cached[1], stale
+                self._drop(key)
+        
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            cached_data = self.serializer.loads(data)
+            saved_at = float(cached_data['saved_at'])
+            context = self._context_from_dict(cached_data['context'])
+        except FileNotFoundError:
+            saved_at = None
+        except Exception as e:
+            logging.getLogger("HeadyBrain").warning("Cache load failed: %s", e)
+            saved_at = None
+        
+        if saved_at is None or now - saved_at >= limit:
+            self.stats["misses"] += 1
+            return None, False
+        
+        # Promote to the memory tier
+        stale = now - saved_at >= ttl_seconds
+        with self._lock:
+            self._remember(key, saved_at, context, len(data))
+            self.stats["stale_hits" if stale else "disk_hits"] += 1
+        return context, stale
+    
+    @staticmethod
+    def _context_from_dict(data: Dict[str, Any]) -> ProcessingContext:
+        """Rebuild a context, ignoring fields this version does not know."""
+        known = {f.name for f in fields(ProcessingContext)}
+        values = {k: v for k, v in data.items() if k in known}
+        values["degraded"] = tuple(values.get("degraded", ()))
+        return ProcessingContext(**values)
+    
+    def put(self, key: str, context: ProcessingContext):
+        """Cache context in both tiers."""
+        saved_at = time.time()
+        data = self.serializer.dumps({'saved_at': saved_at, 'context': asdict(context)})
+        with self._lock:
+            self._remember(key, saved_at, context, len(data))
+        
+        path = self._path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            previous = path.stat().st_size if path.exists() else 0
+            tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except Exception as e:
+            logging.getLogger("HeadyBrain").warning("Cache save failed: %s", e)
+            return
+        
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            else:
+                self._disk_bytes += len(data) - previous
+            over_budget = self._disk_bytes > self.disk_max_bytes
+        if over_budget:
+            self._evict_disk()
+    
+    def _remember(self, key: str, saved_at: float, context: ProcessingContext, size: int):
+        """Insert into the LRU and evict least recently used entries over budget (lock held)."""
+        self._drop(key)
+        if size > self.max_bytes:
+            return
+        self._memory[key] = (saved_at, context, size)
+        self._memory_bytes += size
+        while len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes:
+            _, (_, _, evicted) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted
+            self.stats["memory_evictions"] += 1
+    
+    def _drop(self, key: str):
+        cached = self._memory.pop(key, None)
+        if cached is not None:
+            self._memory_bytes -= cached[2]
+    
+    def _disk_files(self) -> List[Tuple[Path, int, float]]:
+        """(path, size, mtime) of every cache file, including legacy unsharded ones."""
+        files = []
+        paths = [path for suffix in self.SUFFIXES
+                 for pattern in (f"*{suffix}", f"*/*{suffix}")
+                 for path in self.cache_dir.glob(pattern)]
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((path, stat.st_size, stat.st_mtime))
+        return files
+    
+    def _evict_disk(self):
+        """Delete oldest files until the directory is back under 90% of its budget."""
+        files = sorted(self._disk_files(), key=lambda f: f[2])
+        total = sum(size for _, size, _ in files)
+        target = self.disk_max_bytes * 0.9
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.stats["disk_evictions"] += 1
+        with self._lock:
+            self._disk_bytes = total
+    
+    def disk_usage(self) -> Tuple[int, int]:
+        """(file count, total bytes) of the disk tier, measured now."""
+        files = self._disk_files()
+        return len(files), sum(size for _, size, _ in files)
+    
+    def clear(self):
+        """Empty both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._disk_bytes = 0
+        for path, _, _ in self._disk_files():
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "memory_entries": len(self._memory),
+                    "memory_bytes": self._memory_bytes, "disk_bytes": self._disk_bytes}
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key onto one in-flight execution.
+    The first caller runs the function; callers arriving while it runs wait
+    for and share its result (or exception).
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+    
+    def do(self, key: str, fn) -> Tuple[Any, bool]:
+        """Run fn for key, or wait for the call already in flight. Returns (result, shared)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        
+        if not leader:
+            return call.result(), True
+        
+        try:
+            result = fn()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+    
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class BoundedExecutor:
+    """
+    Long-lived thread pool with a bounded backlog.
+    At most max_workers + queue_size tasks may be running or queued; beyond
+    that, submit runs the task in the calling thread (caller-runs policy) and
+    counts a rejection, so load is capped across all requests.
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None, queue_size: Optional[int] = None,
+                 thread_name_prefix: str = "HeadyBrain"):
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 2)
+        self.queue_size = self.max_workers * 4 if queue_size is None else queue_size
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix=thread_name_prefix)
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.queue_size)
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0, "pending": 0}
+    
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = self.try_submit(fn, *args, **kwargs)
+        if future is None:
+            future = Future()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+        return future
+    
+    def try_submit(self, fn, *args, **kwargs) -> Optional[Future]:
+        """Queue fn if the backlog has room; otherwise count a rejection and return None."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats["rejected"] += 1
+            return None
+        
+        with self._lock:
+            self.stats["submitted"] += 1
+            self.stats["pending"] += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+    
+    def _release(self, future: Optional[Future]):
+        self._slots.release()
+        with self._lock:
+            self.stats["pending"] -= 1
+            if future is not None:
+                failed = future.cancelled() or future.exception() is not None
+                self.stats["failed" if failed else "completed"] += 1
+    
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "max_workers": self.max_workers, "queue_size": self.queue_size}
+
+
+class StageTimings:
+    """Per-stage wall-time counters (count, total, max), safe to update from any thread."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, List[float]] = {}
+    
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                self._stages[stage] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+    
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {stage: {"count": count, "total": total, "max": peak,
+                            "average": total / count}
+                    for stage, (count, total, peak) in self._stages.items()}
+
+
+class RoutingTable:
+    """
+    Concept -> task routes compiled once from the built-in task map and the
+    registry's node triggers. Each route carries an estimated cost; measured
+    node latency (conductor execution stats) replaces the estimate when
+    known. route() emits tasks by value per unit cost, best first.
+    
+    Triggers only pick the node behind built-in routes unless invoke_triggers
+    is set, which also turns every other trigger into an "invoke" route.
+    """
+    
+    # Concept -> base task
+    CONCEPT_TASKS = {
+        "deployment": {"action": "deploy", "target": "system", "priority": "high"},
+        "monitoring": {"action": "monitor", "target": "services", "priority": "medium"},
+        "security": {"action": "audit", "target": "security", "priority": "high"},
+        "optimization": {"action": "optimize", "target": "performance", "priority": "medium"},
+        "documentation": {"action": "document", "target": "code", "priority": "low"}
+    }
+    
+    # Estimated seconds per action before any latency has been measured
+    ACTION_COSTS = {"deploy": 5.0, "audit": 3.0, "optimize": 3.0, "monitor": 1.0,
+                    "document": 2.0, "invoke": 2.0}
+    PRIORITY_VALUES = {"high": 3.0, "medium": 2.0, "low": 1.0}
+    
+    def __init__(self, registry=None, conductor=None, invoke_triggers: bool = False):
+        self.conductor = conductor
+        self.invoke_triggers = invoke_triggers
+        self.routes: Dict[str, Dict[str, Any]] = {}
+        self.compile(registry)
+    
+    def compile(self, registry=None):
+        """Rebuild routes; call again when the registry's nodes change."""
+        triggers: Dict[str, str] = {}
+        for node in (getattr(registry, "nodes", None) or {}).values():
+            for trigger in node.trigger_on or []:
+                triggers.setdefault(trigger.lower(), node.name)
+        
+        routes = {}
+        for concept, task in self.CONCEPT_TASKS.items():
+            node = triggers.get(concept) or triggers.get(task["action"])
+            routes[concept] = {**task, "node": node}
+        if self.invoke_triggers:
+            for trigger, node in triggers.items():
+                if trigger not in routes:
+                    routes[trigger] = {"action": "invoke", "target": node, "priority": "medium",
+                                       "node": node}
+        for route in routes.values():
+            route["estimated_cost"] = self.ACTION_COSTS.get(route["action"], 2.0)
+        self.routes = routes
+    
+    def route(self, concepts: Iterable[str]) -> List[Dict[str, Any]]:
+        """Tasks for the routed concepts, cheapest high-value first."""
+        stats = getattr(self.conductor, "execution_stats", None) or {}
+        latency = stats.get("node_latency", {})
+        assigned_at = datetime.now().isoformat()
+        tasks = []
+        for concept in dict.fromkeys(concepts):
+            route = self.routes.get(concept)
+            if route is None:
+                continue
+            measured = latency.get(route["node"]) if route["node"] else None
+            cost = measured if measured is not None else route["estimated_cost"]
+            tasks.append({**route, "concept": concept, "measured_latency": measured,
+                          "score": self.PRIORITY_VALUES[route["priority"]] / max(cost, 1e-3),
+                          "assigned_at": assigned_at})
+        tasks.sort(key=lambda task: (-task["score"], task["concept"]))
+        return tasks
+
+
+class PhraseMatcher:
+    """
+    Vocabulary compiled once into a trie-shaped regex.
+    find() reports every phrase occurring in a text as a substring, overlaps
+    included, in a single pass whose cost follows trie depth rather than
+    vocabulary size.
+    """
+    
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases = sorted({p.lower() for p in phrases if p}, key=len)
+        trie: Dict[str, Any] = {}
+        for phrase in self.phrases:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[""] = True
+        
+        # Zero-width lookahead: the longest phrase starting at each position
+        self._pattern = re.compile(f"(?=({self._trie_regex(trie)}))") if self.phrases else None
+        
+        # Every phrase inside each phrase, so a longest match implies the shorter ones
+        self._contained: Dict[str, Set[str]] = {}
+        for phrase in self.phrases:
+            contained = {phrase}
+            node = trie
+            for i, char in enumerate(phrase[:-1], 1):
+                node = node[char]
+                if "" in node:
+                    contained.add(phrase[:i])
+            for match in self._pattern.finditer(phrase, 1):
+                contained |= self._contained[match.group(1)]
+            self._contained[phrase] = contained
+    
+    @classmethod
+    def _trie_regex(cls, node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + cls._trie_regex(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional tail prefers the longest phrase
+        return f"(?:{body})?" if "" in node else body
+    
+    def find(self, text: str) -> Set[str]:
+        """All vocabulary phrases occurring in text (case-insensitive)."""
+        found: Set[str] = set()
+        if self._pattern is not None:
+            for match in self._pattern.finditer(text.lower()):
+                found |= self._contained[match.group(1)]
+        return found
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One pipeline stage: fn(*inputs) returns its outputs (a tuple when there are several)."""
+    name: str
+    fn: Callable[..., Any]
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...] = ()
+    enabled: Callable[[Dict[str, Any]], Any] = lambda config: True
+
+
+class StageGraph:
+    """
+    Stages wired together by the named values they consume and produce.
+    A stage starts as soon as its inputs exist, so independent stages run
+    concurrently on an executor (each bounded by its budget); without one,
+    or while the executor is saturated, they run inline in declaration order.
+    A stage whose budget is already spent when it becomes ready is not
+    started. Stages whose outputs are already present in the starting
+    values are skipped.
+    
+    execute(stage, args) runs a stage; fallback(stage, error) supplies the
+    result of a disabled (error None), failed or overrunning stage.
+    """
+    
+    def __init__(self, stages: Iterable[Stage]):
+        self.stages = list(stages)
+        produced: Set[str] = set()
+        for stage in self.stages:
+            clash = produced.intersection(stage.outputs)
+            if clash:
+                raise ValueError(f"Stage {stage.name} redefines {sorted(clash)}")
+            produced.update(stage.outputs)
+    
+    def _pending(self, values: Dict[str, Any]) -> List[Stage]:
+        return [stage for stage in self.stages
+                if not stage.outputs or not all(o in values for o in stage.outputs)]
+    
+    @staticmethod
+    def _bind(stage: Stage, values: Dict[str, Any], result: Any):
+        if len(stage.outputs) == 1:
+            values[stage.outputs[0]] = result
+        elif stage.outputs:
+            values.update(zip(stage.outputs, result))
+    
+    def _ready(self, remaining: List[Stage], values: Dict[str, Any]) -> List[Stage]:
+        ready = [stage for stage in remaining if all(i in values for i in stage.inputs)]
+        for stage in ready:
+            remaining.remove(stage)
+        return ready
+    
+    @staticmethod
+    def _unsatisfied(remaining: List[Stage]) -> ValueError:
+        return ValueError(f"Stages with unmet inputs: {[stage.name for stage in remaining]}")
+    
+    def run(self, values: Dict[str, Any], config: Dict[str, Any], execute, fallback,
+            executor=None, budget: Optional[Callable[[Stage], float]] = None) -> Dict[str, Any]:
+        """Run every pending stage, filling values in place."""
+        remaining = self._pending(values)
+        running: Dict[Future, Tuple[Stage, Optional[float]]] = {}
+        while remaining or running:
+            ready = self._ready(remaining, values)
+            for stage in ready:
+                args = [values[i] for i in stage.inputs]
+                if not stage.enabled(config):
+                    self._bind(stage, values, fallback(stage, None))
+                    continue
+                limit = budget(stage) if budget else None
+                if limit is not None and limit <= 0:
+                    self._bind(stage, values, fallback(stage, TimeoutError(stage.name)))
+                    continue
+                
+                future = executor.try_submit(execute, stage, args) if executor else None
+                if future is None:
+                    # Inline: sequential mode, or the caller runs it on a saturated pool
+                    try:
+                        result = execute(stage, args)
+                    except Exception as e:
+                        result = fallback(stage, e)
+                    self._bind(stage, values, result)
+                else:
+                    deadline = None if limit is None else time.time() + limit
+                    running[future] = (stage, deadline)
+            
+            if not running:
+                if remaining and not ready:
+                    raise self._unsatisfied(remaining)
+                continue
+            
+            deadlines = [deadline for _, deadline in running.values() if deadline is not None]
+            timeout = max(0.0, min(deadlines) - time.time()) if deadlines else None
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, _ = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = fallback(stage, e)
+                self._bind(stage, values, result)
+            
+            # Overrunning stages are abandoned (they finish in the background)
+            now = time.time()
+            for future, (stage, deadline) in list(running.items()):
+                if deadline is not None and now >= deadline:
+                    del running[future]
+                    self._bind(stage, values, fallback(stage, TimeoutError(stage.name)))
+        return values
+    
+    async def arun(self, values: Dict[str, Any], config: Dict[str, Any], execute,
+                   fallback) -> Dict[str, Any]:
+        """Async run: execute(stage, args) is a coroutine that enforces its own budget."""
+        remaining = self._pending(values)
+        running: Dict["asyncio.Future", Stage] = {}
+        while remaining or running:
+            ready = self._ready(remaining, values)
+            for stage in ready:
+                if stage.enabled(config):
+                    args = [values[i] for i in stage.inputs]
+                    running[asyncio.ensure_future(execute(stage, args))] = stage
+                else:
+                    self._bind(stage, values, fallback(stage, None))
+            
+            if not running:
+                if remaining and not ready:
+                    raise self._unsatisfied(remaining)
+                continue
+            
+            done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                self._bind(running.pop(task), values, task.result())
+        return values
+
+
 class HeadyBrain:
     """
     BRAIN - The Central Intelligence
@@ -121,27 +810,59 @@ class HeadyBrain:
     Indexed in HeadyRegistry as a core system node.
     """
     
-    def __init__(self, registry=None, lens=None, memory=None, conductor=None):
+    # Concepts recognized directly in request text
+    SYSTEM_CONCEPTS = [
+        "deployment", "monitoring", "security", "optimization", "documentation",
+        "workflow", "node", "service", "database", "api", "frontend",
+        "authentication", "encryption", "visualization", "testing"
+    ]
+    
+    # Request pattern -> indicator phrases
+    PATTERN_INDICATORS = {
+        "deployment_request": ["deploy", "deployment", "release", "publish"],
+        "security_request": ["security", "audit", "scan", "vulnerability"],
+        "monitoring_request": ["monitor", "check", "status", "health"],
+        "optimization_request": ["optimize", "improve", "enhance", "boost"],
+        "troubleshooting_request": ["fix", "error", "issue", "problem", "debug"]
+    }
+    
+    STOP_WORDS = frozenset({"the", "a", "an", "and", "or", "but", "in", "on", "at", "to",
+                            "for", "of", "with", "by"})
+    
+    # Pipeline stage -> _get_default_result key of its empty result
+    STAGE_DEFAULTS = {"awareness": "system", "recall": "memory", "analysis": "analysis",
+                      "comparative": "comparative", "plan": "plan", "store": None}
+    
+    # Source recorded on processing contexts stored in MEMORY
+    MEMORY_SOURCE = "brain"
+    
+    # Stages whose last-known-good result stays valid across requests, with max age (s)
+    LAST_GOOD_MAX_AGE = {"awareness": 60.0}
+    
+    def __init__(self, registry=None, lens=None, memory=None, conductor=None,
+                 verbose: Optional[bool] = None, cache_dir: Optional[str] = None):
         self.registry = registry
         self.lens = lens
         self.memory = memory
         self.conductor = conductor
         
         # Performance optimization components
-        self.executor = ThreadPoolExecutor(max_workers=4)
-        self.cache_dir = Path(".heady_cache")
-        self.cache_dir.mkdir(exist_ok=True)
-        
-        # Setup logging
-        self.logger = logging.getLogger("HeadyBrain")
-        if not self.logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
-            self.logger.setLevel(logging.INFO)
+        # One pool shared by every request, sized from the host
+        self.executor = BoundedExecutor()
+        self.cache_dir = Path(cache_dir) if cache_dir else Path(".heady_cache")
+        self.context_cache = ContextCache(self.cache_dir)
+        
+        # Identical concurrent requests share one pipeline run
+        self._inflight = SingleFlight()
+        
+        # Stages and the values they exchange, run by every entry point
+        self.stage_graph = self._build_stage_graph()
+        
+        # Per-request progress only when verbose; the shared logger is configured at import
+        self.logger = BrainLogger(logging.getLogger("HeadyBrain"), verbose)
+        
+        # Wall time of every stage run, however the pipeline was invoked
+        self.stage_timings = StageTimings()
         
         # Default configuration: use all systems
         self.default_config = {
@@ -149,17 +870,38 @@ class HeadyBrain:
             "use_memory": True,
             "use_conductor": True,
             "use_all_nodes": True,
-            "enable_external_sources": True,
+            # Recall also reads stored external sources (one extra query per request)
+            "enable_external_sources": False,
             "enable_comparative_analysis": True,
             "enable_caching": True,
             "enable_parallel_processing": True,
-            "cache_ttl_minutes": 30
+            "cache_ttl_minutes": 30,
+            # Past the TTL an entry is still served for this long while it is
+            # refreshed in the background; beyond it callers wait for a fresh run
+            "cache_max_stale_minutes": 10,
+            # Latency budget: the whole request, and a cap per stage (seconds).
+            # A stage gets the smaller of its cap and what is left of the request.
+            "request_deadline": 5.0,
+            "stage_deadlines": {"awareness": 1.0, "recall": 2.0, "analysis": 1.0,
+                                "comparative": 1.0, "plan": 2.0, "store": 1.0}
         }
         
+        # Cache keys with a background refresh queued or running
+        self._revalidating: set = set()
+        self._revalidate_lock = threading.Lock()
+        
+        # Last-known-good results served when a stage overruns
+        self._last_good: Dict[str, Tuple[float, Any]] = {}
+        
         # Performance metrics
         self.metrics = {
             "requests_processed": 0,
             "cache_hits": 0,
+            "stale_hits": 0,
+            "revalidations": 0,
+            "coalesced_requests": 0,
+            "degraded_requests": 0,
+            "stage_overruns": {},
             "average_processing_time": 0.0,
             "total_processing_time": 0.0
         }
@@ -173,14 +915,23 @@ class HeadyBrain:
             "adaptive_adjustments": 0
         }
         
+        # Concept and indicator vocabularies, matched in one pass per request
+        self.system_concepts = list(self.SYSTEM_CONCEPTS)
+        self.vocabulary = self._compile_vocabulary()
+        
+        # Concept -> task routes, costed by the conductor's measured node latency
+        self.routing = RoutingTable(registry, conductor)
+        
         # Pattern recognition cache
         self.pattern_cache = {}
         self.knowledge_graph = {}
         
         print("BRAIN: Initialized - The Central Intelligence is ready")
         print(f"  * Performance optimizations enabled")
-        print(f"  * Cache directory: {self.cache_dir}")
-        print(f"  * Parallel processing: {self.executor._max_workers} workers")
+        print(f"  * Cache directory: {self.cache_dir} "
+              f"(LRU: {self.context_cache.max_entries} entries in RAM)")
+        print(f"  * Parallel processing: {self.executor.max_workers} workers "
+              f"(backlog {self.executor.queue_size})")
     
     @performance_monitor
     def process_request(self, request: str, user_config: Optional[Dict[str, Any]] = None) -> ProcessingContext:
@@ -207,183 +958,345 @@ class HeadyBrain:
         
         timestamp = datetime.now().isoformat()
         
-        print(f"\n{'='*80}")
-        print("BRAIN - ENHANCED INTELLIGENCE PROCESSING PIPELINE")
-        print(f"{'='*80}")
-        print(f"Request: {request}")
-        print(f"Timestamp: {timestamp}")
-        print(f"Configuration: Enhanced learning mode active")
+        self.logger.info("Processing request %r at %s", request, timestamp)
         
         # Check cache first if enabled
-        cache_key = None
+        cache_key = self._get_cache_key(request, config)
         if config["enable_caching"]:
-            cache_key = self._get_cache_key(request, config)
-            cached_context = self._load_from_cache(cache_key, config["cache_ttl_minutes"])
+            cached_context = self._load_from_cache(cache_key, config["cache_ttl_minutes"],
+                                                   config["cache_max_stale_minutes"])
+            if cached_context:
+                self.metrics["cache_hits"] += 1
+                if cached_context.stale:
+                    self._revalidate(request, config, cache_key)
+                    self.logger.info("Stale cache hit - refreshing in background")
+                else:
+                    self.logger.info("Cache hit - returning cached context")
+                # Shallow copy so the cached instance is never mutated by callers
+                return replace(cached_context, cache_hit=True)
+        
+        # Coalesce with an identical request already being processed
+        context, shared = self._inflight.do(
+            cache_key, lambda: self._run_pipeline(request, config, timestamp, cache_key)
+        )
+        if shared:
+            self.metrics["coalesced_requests"] += 1
+            self.logger.info("Coalesced with in-flight identical request")
+            return replace(context)
+        return context
+    
+    def process_batch(self, requests: List[str],
+                      user_config: Optional[Dict[str, Any]] = None) -> List[ProcessingContext]:
+        """
+        Process many requests for offline callers (audits, notebooks, replays).
+        System awareness and preferences are gathered once, recall runs as one
+        multi-query, and per-request analysis, planning and storage fan out
+        across the shared pool. Identical requests are processed once.
+        The shared stages run under request_deadline from the batch start and
+        degrade as in process_request, marking every context they feed. Each
+        request's own stages get request_deadline from when it starts; once
+        that is spent its remaining stages degrade, as in sequential mode.
+        Returns one context per request, in order.
+        """
+        started = time.time()
+        config = {**self.default_config, **(user_config or {})}
+        timestamp = datetime.now().isoformat()
+        self.learning_metrics["total_processed"] += len(requests)
+        self.logger.info("Processing batch of %d requests", len(requests))
+        
+        cache_keys = [self._get_cache_key(request, config) for request in requests]
+        results: Dict[str, ProcessingContext] = {}
+        pending: Dict[str, str] = {}  # cache key -> request, first occurrence
+        for request, cache_key in zip(requests, cache_keys):
+            if cache_key in results or cache_key in pending:
+                continue
+            cached_context = None
+            if config["enable_caching"]:
+                cached_context = self._load_from_cache(cache_key, config["cache_ttl_minutes"],
+                                                       config["cache_max_stale_minutes"])
             if cached_context:
                 self.metrics["cache_hits"] += 1
-                cached_context.cache_hit = True
-                print("  Cache hit - returning cached context")
-                return cached_context
+                if cached_context.stale:
+                    self._revalidate(request, config, cache_key)
+                results[cache_key] = replace(cached_context, cache_hit=True)
+            else:
+                pending[cache_key] = request
+        
+        if pending:
+            batch = list(pending.values())
+            # Shared stages get the same budgets and fallbacks as a single request
+            shared_degraded: List[str] = []
+            shared = self._batch_stage_graph().run(
+                {"requests": batch, "config": config}, config, self._execute_stage,
+                lambda stage, error: self._stage_fallback(stage, error, shared_degraded),
+                executor=self.executor,
+                budget=lambda stage: self._stage_budget(config, stage.name, started))
+            shared.pop("requests")
+            recalled = shared.pop("recalled")
+            if len(recalled) != len(batch):  # recall degraded to the single-request default
+                recalled = [[] for _ in batch]
+            
+            # The graph skips awareness and recall, whose outputs are already supplied
+            def finish(request: str, relevant_memories: List[Dict]) -> ProcessingContext:
+                context = self._process_stages(request, config, timestamp, parallel=False, values={
+                    **shared, "relevant_memories": relevant_memories})
+                context.degraded = tuple(shared_degraded) + context.degraded
+                context.processing_time = time.time() - started
+                return context
+            
+            futures = [self.executor.submit(finish, request, memories)
+                       for request, memories in zip(batch, recalled)]
+            for cache_key, future in zip(pending, futures):
+                context = future.result()
+                if config["enable_caching"] and not context.degraded:
+                    self._save_to_cache(cache_key, replace(context))
+                self._update_metrics(context.processing_time, context.degraded)
+                results[cache_key] = context
+        
+        # Later duplicates get their own copy of the shared context
+        contexts, seen = [], set()
+        for cache_key in cache_keys:
+            context = results[cache_key]
+            contexts.append(context if cache_key not in seen else replace(context))
+            seen.add(cache_key)
+        
+        self.logger.info("Batch of %d processed in %.3fs (%d computed)",
+                         len(requests), time.time() - started, len(pending))
+        return contexts
+    
+    async def aprocess_request(self, request: str,
+                               user_config: Optional[Dict[str, Any]] = None) -> ProcessingContext:
+        """
+        Asyncio-native processing pipeline for async servers.
+        Stages run as tasks within the request's latency budget; blocking LENS,
+        MEMORY and CONDUCTOR calls run on the shared executor, so the event loop
+        is never blocked. A stage that fails or overruns degrades gracefully.
+        """
+        started = time.time()
+        self.learning_metrics["total_processed"] += 1
+        config = {**self.default_config, **(user_config or {})}
+        timestamp = datetime.now().isoformat()
+        degraded: List[str] = []
         
+        cache_key = self._get_cache_key(request, config)
+        if config["enable_caching"]:
+            cached_context = await self._offload(self._load_from_cache, cache_key,
+                                                 config["cache_ttl_minutes"],
+                                                 config["cache_max_stale_minutes"])
+            if cached_context:
+                self.metrics["cache_hits"] += 1
+                if cached_context.stale:
+                    self._revalidate(request, config, cache_key)
+                return replace(cached_context, cache_hit=True)
+        
+        async def execute(stage: Stage, args: List[Any]):
+            return await self._astage(stage, args, config, started, degraded)
+        
+        values = await self.stage_graph.arun(
+            {"request": request, "config": config}, config, execute,
+            lambda stage, error: self._stage_fallback(stage, error, degraded))
+        context = self._context_from_values(values, timestamp)
+        context.degraded = tuple(degraded)
+        if config["enable_caching"] and not context.degraded:
+            await self._offload(self._save_to_cache, cache_key, replace(context))
+        
+        context.processing_time = time.time() - started
+        self._update_metrics(context.processing_time, context.degraded)
+        return context
+    
+    async def _offload(self, fn, *args):
+        """Run a blocking call on the shared executor, waiting (not blocking) while it is full."""
+        delay = 0.005
+        while True:
+            future = self.executor.try_submit(fn, *args)
+            if future is not None:
+                return await asyncio.wrap_future(future)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+    
+    async def _astage(self, stage: Stage, args: List[Any], config: Dict[str, Any],
+                      started: float, degraded: List[str]):
+        """Offloaded stage bounded by its budget; degrades to a fallback result."""
+        try:
+            return await asyncio.wait_for(self._offload(self._execute_stage, stage, args),
+                                          timeout=self._stage_budget(config, stage.name, started))
+        except Exception as e:
+            return self._degrade(stage.name, e, degraded)
+    
+    def _execute_stage(self, stage: Stage, args: List[Any]):
+        """Run a stage, remembering its result as the last known good."""
+        result = self._run_stage(stage.name, stage.fn, *args)
+        self._last_good[stage.name] = (time.time(), result)
+        return result
+    
+    def _stage_fallback(self, stage: Stage, error: Optional[Exception], degraded: List[str]):
+        """Empty result for a disabled stage (error None), else the degraded fallback."""
+        if error is None:
+            return self._get_default_result(self.STAGE_DEFAULTS.get(stage.name))
+        return self._degrade(stage.name, error, degraded)
+    
+    def _run_stage(self, name: str, fn, *args):
+        """Run one stage, recording its wall time."""
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.stage_timings.record(name, time.perf_counter() - started)
+    
+    def _stage_budget(self, config: Dict[str, Any], name: str, started: float) -> float:
+        """Seconds stage name may take: its cap, bounded by the rest of the request budget."""
+        caps = {**self.default_config["stage_deadlines"], **config.get("stage_deadlines", {})}
+        remaining = config["request_deadline"] - (time.time() - started)
+        return max(0.0, min(caps[name], remaining))
+    
+    def _degrade(self, name: str, error: Exception, degraded: List[str]):
+        """Record an overrun or failed stage and return its fallback result."""
+        reason = "budget exceeded" if isinstance(error, (TimeoutError, asyncio.TimeoutError)) else repr(error)
+        self.logger.warning("Stage %s degraded: %s", name, reason)
+        degraded.append(name)
+        overruns = self.metrics["stage_overruns"]
+        overruns[name] = overruns.get(name, 0) + 1
+        
+        last_good = self._last_good.get(name)
+        max_age = self.LAST_GOOD_MAX_AGE.get(name)
+        if last_good and max_age and time.time() - last_good[0] < max_age:
+            return last_good[1]
+        return self._get_default_result(self.STAGE_DEFAULTS[name])
+    
+    def _revalidate(self, request: str, config: Dict[str, Any], cache_key: str):
+        """
+        Refresh a stale cache entry in the background, at most once per key.
+        Refreshes use at most half the shared pool and are skipped when it is
+        busy; the entry keeps being served stale until its max-stale limit.
+        A refresh runs under the same budgets as a foreground request.
+        """
+        with self._revalidate_lock:
+            if cache_key in self._revalidating or \
+                    len(self._revalidating) >= max(1, self.executor.max_workers // 2):
+                return
+            self._revalidating.add(cache_key)
+        
+        def refresh():
+            try:
+                self._inflight.do(cache_key, lambda: self._run_pipeline(
+                    request, config, datetime.now().isoformat(), cache_key))
+                self.metrics["revalidations"] += 1
+            except Exception as e:
+                self.logger.warning("Cache revalidation failed: %s", e)
+            finally:
+                with self._revalidate_lock:
+                    self._revalidating.discard(cache_key)
+        
+        if self.executor.try_submit(refresh) is None:
+            with self._revalidate_lock:
+                self._revalidating.discard(cache_key)
+    
+    def _run_pipeline(self, request: str, config: Dict[str, Any], timestamp: str,
+                      cache_key: str) -> ProcessingContext:
+        """Run the processing stages, then cache the context and update metrics."""
         # Parallel processing of stages
         if config["enable_parallel_processing"]:
             context = self._process_request_parallel(request, config, timestamp)
         else:
             context = self._process_request_sequential(request, config, timestamp)
         
-        # Cache the result if enabled
-        if config["enable_caching"] and cache_key:
-            self._save_to_cache(cache_key, context)
+        # Cache the result if enabled; degraded contexts are retried instead
+        if config["enable_caching"] and not context.degraded:
+            self._save_to_cache(cache_key, replace(context))
         
         # Update metrics
-        self._update_metrics(context.processing_time)
-        print("BRAIN - ENHANCED INTELLIGENCE PROCESSING COMPLETE")
-        print(f"Learning metrics updated: {self.learning_metrics}")
-        print(f"{'='*80}\n")
+        self._update_metrics(context.processing_time, context.degraded)
+        self.logger.info("Request processed in %.3fs (degraded: %s)",
+                         context.processing_time, context.degraded or "none")
         
         return context
     
     def _process_request_sequential(self, request: str, config: Dict[str, Any], timestamp: str) -> ProcessingContext:
-        """Process request sequentially (original method)."""
-        # Stage 1: Gather system awareness from LENS
-        system_state, active_nodes, service_health = self._gather_system_awareness(config)
-        
-        # Stage 2: Recall relevant knowledge from MEMORY
-        relevant_memories, user_preferences, external_sources = self._recall_knowledge(request, config)
-        
-        # Stage 3: Identify concepts and assign tasks
-        concepts_identified, tasks_assigned = self._analyze_and_assign(request, relevant_memories)
-        
-        # Stage 4: Perform comparative analysis
-        comparative_analysis = self._perform_comparative_analysis(request, external_sources, config)
-        
-        # Stage 5: Generate orchestration plan from CONDUCTOR
-        execution_plan = self._generate_execution_plan(request, config)
-        
-        # Stage 6: Store processing context in MEMORY
-        self._store_processing_context(request, concepts_identified, tasks_assigned, execution_plan)
-        
-        return self._create_context(
-            request, timestamp, system_state, active_nodes, service_health,
-            relevant_memories, user_preferences, external_sources,
-            execution_plan, concepts_identified, tasks_assigned, comparative_analysis
-        )
+        """Run the stage graph inline, one stage at a time."""
+        return self._process_stages(request, config, timestamp, parallel=False)
     
     def _process_request_parallel(self, request: str, config: Dict[str, Any], timestamp: str) -> ProcessingContext:
-        """Process request with parallel execution where possible."""
-        futures = {}
-        
-        # Submit parallel tasks
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            # System awareness can run in parallel with memory recall
-            if config["use_lens"] and self.lens:
-                futures["system"] = executor.submit(self._gather_system_awareness, config)
-            
-            if config["use_memory"] and self.memory:
-                futures["memory"] = executor.submit(self._recall_knowledge, request, config)
-            
-            # Wait for parallel tasks
-            results = {}
-            for key, future in futures.items():
-                try:
-                    results[key] = future.result(timeout=10)
-                except Exception as e:
-                    self.logger.warning(f"Parallel task {key} failed: {e}")
-                    results[key] = self._get_default_result(key)
-        
-        # Extract results
-        system_state, active_nodes, service_health = results.get("system", self._get_default_result("system"))
-        relevant_memories, user_preferences, external_sources = results.get("memory", self._get_default_result("memory"))
-        
-        # Sequential tasks that depend on above results
-        concepts_identified, tasks_assigned = self._analyze_and_assign(request, relevant_memories)
-        comparative_analysis = self._perform_comparative_analysis(request, external_sources, config)
-        execution_plan = self._generate_execution_plan(request, config)
-        
-        # Store processing context
-        self._store_processing_context(request, concepts_identified, tasks_assigned, execution_plan)
-        
-        return self._create_context(
-            request, timestamp, system_state, active_nodes, service_health,
-            relevant_memories, user_preferences, external_sources,
-            execution_plan, concepts_identified, tasks_assigned, comparative_analysis
-        )
         """
-        Process request with full context gathering.
-        Returns comprehensive context for conductor to use.
+        Run the stage graph on the shared pool: each stage starts once its
+        inputs exist and is awaited only for its budget.
         """
-        
-        # Process request to gather context
-        context = self.process_request(request, user_config)
-        
-        # Record execution in LENS (without calling conductor to avoid recursion)
-        if self.lens:
-            for node_info in context.execution_plan.get("nodes_to_invoke", []):
-                self.lens.record_node_activity(node_info["name"])
-            
-            for workflow_info in context.execution_plan.get("workflows_to_execute", []):
-                self.lens.record_workflow_execution(workflow_info["name"])
-        
-        # Return comprehensive context (converted to dict manually)
-        return {
-            "request": request,
-            "context": {
-                "request": context.request,
-                "timestamp": context.timestamp,
-                "system_state": context.system_state,
-                "active_nodes": context.active_nodes,
-                "service_health": context.service_health,
-                "relevant_memories": context.relevant_memories,
-                "user_preferences": context.user_preferences,
-                "external_sources": context.external_sources,
-                "execution_plan": context.execution_plan,
-                "concepts_identified": context.concepts_identified,
-                "tasks_assigned": context.tasks_assigned,
-                "comparative_analysis": context.comparative_analysis,
-                "patterns_identified": getattr(context, 'patterns_identified', []),
-                "synthesized_knowledge": getattr(context, 'synthesized_knowledge', {}),
-                "predictions": getattr(context, 'predictions', []),
-                "learning_metrics": getattr(context, 'learning_metrics', {})
-            },
-            "timestamp": datetime.now().isoformat(),
-            "learning_enabled": True
-        }
+        return self._process_stages(request, config, timestamp, parallel=True)
+    
+    def _process_stages(self, request: str, config: Dict[str, Any], timestamp: str,
+                        parallel: bool, values: Optional[Dict[str, Any]] = None) -> ProcessingContext:
+        """Run the stage graph from request, config and any precomputed values."""
+        started = time.time()
+        degraded: List[str] = []
+        values = self.stage_graph.run(
+            {**(values or {}), "request": request, "config": config}, config,
+            self._execute_stage, lambda stage, error: self._stage_fallback(stage, error, degraded),
+            executor=self.executor if parallel else None,
+            budget=lambda stage: self._stage_budget(config, stage.name, started))
+        context = self._context_from_values(values, timestamp)
+        context.degraded = tuple(degraded)
+        return context
+    
+    def _build_stage_graph(self) -> StageGraph:
+        """The processing stages and the values they exchange; subclasses may extend it."""
+        return StageGraph([
+            Stage("awareness", self._gather_system_awareness, ("config",),
+                  ("system_state", "active_nodes", "service_health"),
+                  enabled=lambda config: config["use_lens"] and self.lens),
+            Stage("recall", self._recall_knowledge, ("request", "config"),
+                  ("relevant_memories", "user_preferences", "external_sources"),
+                  enabled=lambda config: config["use_memory"] and self.memory),
+            Stage("analysis", self._analyze_and_assign, ("request", "relevant_memories"),
+                  ("concepts_identified", "tasks_assigned")),
+            Stage("comparative", self._perform_comparative_analysis,
+                  ("request", "external_sources", "config"), ("comparative_analysis",)),
+            Stage("plan", self._generate_execution_plan, ("request", "config"), ("execution_plan",)),
+            Stage("store", self._store_processing_context,
+                  ("request", "concepts_identified", "tasks_assigned", "execution_plan"),
+                  enabled=lambda config: self.memory),
+        ])
+    
+    def _batch_stage_graph(self) -> StageGraph:
+        """Awareness and multi-query recall, run once for a whole batch."""
+        awareness, recall = (next(stage for stage in self.stage_graph.stages if stage.name == name)
+                             for name in ("awareness", "recall"))
+        return StageGraph([
+            awareness,
+            Stage("recall", self._recall_knowledge_many, ("requests", "config"),
+                  ("recalled", "user_preferences", "external_sources"), enabled=recall.enabled),
+        ])
+    
+    def _context_from_values(self, values: Dict[str, Any], timestamp: str) -> ProcessingContext:
+        return self._create_context(
+            values["request"], timestamp, values["system_state"], values["active_nodes"],
+            values["service_health"], values["relevant_memories"], values["user_preferences"],
+            values["external_sources"], values["execution_plan"], values["concepts_identified"],
+            values["tasks_assigned"], values["comparative_analysis"]
+        )
     
     def _get_cache_key(self, request: str, config: Dict[str, Any]) -> str:
         """Generate cache key for request."""
         cache_data = f"{request}:{json.dumps(config, sort_keys=True)}"
         return hashlib.md5(cache_data.encode()).hexdigest()
     
-    def _load_from_cache(self, cache_key: str, ttl_minutes: int) -> Optional[ProcessingContext]:
-        """Load cached context if available and not expired."""
-        cache_file = self.cache_dir / f"{cache_key}.pkl"
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'rb') as f:
-                    cached_data = pickle.load(f)
-                
-                cached_time = datetime.fromisoformat(cached_data['timestamp'])
-                if datetime.now() - cached_time < timedelta(minutes=ttl_minutes):
-                    return cached_data['context']
-            except Exception as e:
-                self.logger.warning(f"Cache load failed: {e}")
-        return None
+    def _load_from_cache(self, cache_key: str, ttl_minutes: int,
+                         max_stale_minutes: int = 0) -> Optional[ProcessingContext]:
+        """Load cached context if fresh, or marked stale within the grace window."""
+        context, stale = self.context_cache.lookup(cache_key, ttl_minutes * 60,
+                                                   max_stale_minutes * 60)
+        if context is not None and stale:
+            self.metrics["stale_hits"] += 1
+            return replace(context, stale=True)
+        return context
     
     def _save_to_cache(self, cache_key: str, context: ProcessingContext):
         """Save context to cache."""
-        cache_file = self.cache_dir / f"{cache_key}.pkl"
-        try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump({
-                    'timestamp': datetime.now().isoformat(),
-                    'context': context
-                }, f)
-        except Exception as e:
-            self.logger.warning(f"Cache save failed: {e}")
+        self.context_cache.put(cache_key, context)
     
-    def _update_metrics(self, processing_time: float):
+    def _update_metrics(self, processing_time: float, degraded: Tuple[str, ...] = ()):
         """Update performance metrics."""
         self.metrics["requests_processed"] += 1
+        if degraded:
+            self.metrics["degraded_requests"] += 1
         self.metrics["total_processing_time"] += processing_time
         self.metrics["average_processing_time"] = (
             self.metrics["total_processing_time"] / self.metrics["requests_processed"]
@@ -395,6 +1308,13 @@ class HeadyBrain:
             return {}, [], {}
         elif key == "memory":
             return [], {}, []
+        elif key == "analysis":
+            return [], []
+        elif key == "comparative":
+            return "Comparative analysis unavailable"
+        elif key == "plan":
+            return {"confidence": 0.0, "nodes_to_invoke": [], "workflows_to_execute": [],
+                    "tools_to_use": [], "services_required": []}
         return None
     
     def _gather_system_awareness(self, config: Dict[str, Any]) -> Tuple[Dict, List, Dict]:
@@ -406,13 +1326,35 @@ class HeadyBrain:
     
     def _recall_knowledge(self, request: str, config: Dict[str, Any]) -> Tuple[List, Dict, List]:
         """Recall knowledge from MEMORY."""
-        if config["use_memory"] and self.memory:
-            keywords = self._extract_keywords(request)
-            memories = self.memory.search(keywords[:5], max_results=10)
-            preferences = self.memory.get_all_preferences()
-            external = []
-            return memories, preferences, external
-        return [], {}, []
+        memories, preferences, external = self._recall_knowledge_many([request], config)
+        return memories[0], preferences, external
+    
+    def _recall_knowledge_many(self, requests: List[str],
+                               config: Dict[str, Any]) -> Tuple[List[List], Dict, List]:
+        """Recall memories for every request in one multi-query; preferences load once."""
+        if not (config["use_memory"] and self.memory):
+            return [[] for _ in requests], {}, []
+        
+        keyword_sets = [self._extract_keywords(request)[:5] for request in requests]
+        if hasattr(self.memory, "search_many"):
+            recalled = self.memory.search_many(keyword_sets, max_results=10)
+        else:
+            recalled = [self.memory.search(keywords, max_results=10) for keywords in keyword_sets]
+        
+        # Semantic tier catches paraphrases the keyword search misses
+        short = [i for i, memories in enumerate(recalled) if len(memories) < 10]
+        if short and getattr(self.memory, "semantic_enabled", False):
+            similar = self.memory.semantic_search_many([requests[i] for i in short], max_results=10)
+            for i, matches in zip(short, similar):
+                memories = recalled[i]
+                seen = {m["id"] for m in memories}
+                for memory in matches:
+                    if memory["id"] not in seen and len(memories) < 10:
+                        memories.append(memory)
+        
+        preferences = self.memory.get_all_preferences()
+        external = self.memory.get_external_sources() if config["enable_external_sources"] else []
+        return recalled, preferences, external
     
     def _analyze_and_assign(self, request: str, memories: List[Dict]) -> Tuple[List, List]:
         """Analyze request and assign tasks."""
@@ -430,7 +1372,7 @@ class HeadyBrain:
         """Generate execution plan."""
         if config["use_conductor"] and self.conductor:
             return self.conductor.analyze_request(request)
-        return {"confidence": 0.0, "nodes_to_invoke": [], "workflows_to_execute": [], "tools_to_use": [], "services_required": []}
+        return self._get_default_result("plan")
     
     def _store_processing_context(self, request: str, concepts: List[str], tasks: List[Dict], plan: Dict):
         """Store processing context in memory."""
@@ -439,7 +1381,7 @@ class HeadyBrain:
                 category="processing_context",
                 content={"request": request, "concepts": concepts, "tasks": tasks, "plan": plan},
                 tags=concepts[:5],
-                source="brain"
+                source=self.MEMORY_SOURCE
             )
     
     def _create_context(self, request, timestamp, system_state, active_nodes, service_health,
@@ -462,14 +1404,23 @@ class HeadyBrain:
             confidence_score=execution_plan.get("confidence", 0.0)
         )
     
+    def _compile_vocabulary(self) -> PhraseMatcher:
+        indicators = [i for phrases in self.PATTERN_INDICATORS.values() for i in phrases]
+        return PhraseMatcher(self.system_concepts + indicators)
+    
+    def register_concepts(self, concepts: Iterable[str]):
+        """Extend the recognized concept vocabulary (recompiled once per call)."""
+        known = set(self.system_concepts)
+        self.system_concepts.extend(c.lower() for c in concepts if c and c.lower() not in known)
+        self.vocabulary = self._compile_vocabulary()
+    
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract keywords from text for indexing."""
         # Simple keyword extraction (can be enhanced with NLP)
         words = text.lower().split()
         
         # Filter common words
-        stop_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by"}
-        keywords = [w for w in words if w not in stop_words and len(w) > 3]
+        keywords = [w for w in words if w not in self.STOP_WORDS and len(w) > 3]
         
         return list(set(keywords))
     
@@ -519,23 +1470,16 @@ class HeadyBrain:
     def _recognize_patterns(self, request: str, memories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Recognize patterns in request and historical data."""
         patterns = []
-        request_lower = request.lower()
+        found = self.vocabulary.find(request)
         
         # Check for common request patterns
-        pattern_indicators = {
-            "deployment_request": ["deploy", "deployment", "release", "publish"],
-            "security_request": ["security", "audit", "scan", "vulnerability"],
-            "monitoring_request": ["monitor", "check", "status", "health"],
-            "optimization_request": ["optimize", "improve", "enhance", "boost"],
-            "troubleshooting_request": ["fix", "error", "issue", "problem", "debug"]
-        }
-        
-        for pattern_type, indicators in pattern_indicators.items():
-            if any(indicator in request_lower for indicator in indicators):
+        for pattern_type, indicators in self.PATTERN_INDICATORS.items():
+            matched = [i for i in indicators if i in found]
+            if matched:
                 patterns.append({
                     "type": pattern_type,
                     "confidence": 0.8,
-                    "indicators": [i for i in indicators if i in request_lower],
+                    "indicators": matched,
                     "timestamp": datetime.now().isoformat()
                 })
         
@@ -688,21 +1632,9 @@ class HeadyBrain:
         }
     
     def _identify_concepts(self, request: str, memories: List[Dict[str, Any]]) -> List[str]:
-        concepts = set()
-        
-        # Extract from request
-        request_lower = request.lower()
-        
-        # System concepts
-        system_concepts = [
-            "deployment", "monitoring", "security", "optimization", "documentation",
-            "workflow", "node", "service", "database", "api", "frontend",
-            "authentication", "encryption", "visualization", "testing"
-        ]
-        
-        for concept in system_concepts:
-            if concept in request_lower:
-                concepts.add(concept)
+        # System concepts found in the request, in one pass
+        found = self.vocabulary.find(request)
+        concepts = {concept for concept in self.system_concepts if concept in found}
         
         # Extract from memories
         for memory in memories[:10]:  # Top 10 memories
@@ -712,28 +1644,8 @@ class HeadyBrain:
         return list(concepts)
     
     def _assign_tasks(self, request: str, concepts: List[str]) -> List[Dict[str, Any]]:
-        """Assign tasks based on request and concepts."""
-        tasks = []
-        
-        # Map concepts to potential tasks
-        concept_task_map = {
-            "deployment": {"action": "deploy", "target": "system", "priority": "high"},
-            "monitoring": {"action": "monitor", "target": "services", "priority": "medium"},
-            "security": {"action": "audit", "target": "security", "priority": "high"},
-            "optimization": {"action": "optimize", "target": "performance", "priority": "medium"},
-            "documentation": {"action": "document", "target": "code", "priority": "low"}
-        }
-        
-        for concept in concepts:
-            if concept in concept_task_map:
-                task = {
-                    **concept_task_map[concept],
-                    "concept": concept,
-                    "assigned_at": datetime.now().isoformat()
-                }
-                tasks.append(task)
-        
-        return tasks
+        """Assign tasks for the concepts, best value per unit cost first."""
+        return self.routing.route(concepts)
     
     def _comparative_analysis(self, request: str, external_sources: List[Dict[str, Any]]) -> str:
         """Perform comparative analysis with external sources."""
@@ -777,12 +1689,20 @@ class HeadyBrain:
         if self.registry:
             awareness["registry_summary"] = self.registry.get_summary()
         
+        awareness["cache_stats"] = self.context_cache.get_stats()
+        awareness["executor_stats"] = self.executor.get_stats()
+        awareness["stage_timings"] = self.stage_timings.get_stats()
+        
         # Don't call conductor.get_system_summary() to avoid circular recursion
         if self.conductor:
             awareness["execution_log_size"] = len(self.conductor.execution_log)
         
         return awareness
     
+    def close(self):
+        """Release the shared worker pool."""
+        self.executor.shutdown(wait=True)
+    
     def configure_user_preferences(self, preferences: Dict[str, Any]):
         """Configure user preferences for service selection."""
         if self.memory:
@@ -798,6 +1718,7 @@ class HeadyBrain:
 
 
 if __name__ == "__main__":
+    setup_logging()
     brain = HeadyBrain()
     
     print("\n" + "="*80)
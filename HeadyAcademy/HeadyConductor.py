@@ -40,13 +40,177 @@ import sys
 import json
 import asyncio
 import subprocess
+import time
+from collections import Counter
+from itertools import chain
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Set, Tuple
 from datetime import datetime
 from HeadyRegistry import HeadyRegistry, Node, Workflow, Service, Tool
 from HeadyLens import HeadyLens
-from HeadyMemory import HeadyMemory
-from HeadyBrain import HeadyBrain
+from HeadyMemory import HeadyMemory, RetentionPolicy
+from HeadyBrain import HeadyBrain, PhraseMatcher, setup_logging
+
+
+class RoutingIndex:
+    """
+    Inverted index from request phrases to registry capabilities, compiled
+    from HeadyRegistry. Slash commands, names, node triggers and roles, tool
+    names and service keywords map to (kind, name) with a precomputed
+    confidence weight; workflow description words map to workflows. A
+    request is routed with one pass of a compiled phrase matcher plus one
+    lookup per request word, whatever the registry size. sync() re-indexes
+    only the entities that changed since the registry's last version.
+    """
+    
+    KINDS = ("workflows", "nodes", "tools", "services")
+    
+    # Service type -> request keywords that require it
+    SERVICE_KEYWORDS = {
+        "api": ["api", "endpoint", "request", "server", "service"],
+        "database": ["database", "postgres", "db", "query", "data"],
+        "cache": ["cache", "redis", "memory", "store"],
+        "mcp": ["mcp", "protocol", "connect", "bridge"],
+        "frontend": ["ui", "interface", "web", "frontend", "app"]
+    }
+    
+    # Workflows whose description shares this many words with the request match
+    DESCRIPTION_OVERLAP = 2
+    
+    def __init__(self, registry):
+        self.registry = registry
+        self._phrases: Dict[str, Dict[Tuple[str, str], float]] = {}
+        self._words: Dict[str, Set[str]] = {}
+        # (kind, name) -> (signature, phrase weights, description words)
+        self._entries: Dict[Tuple[str, str], Tuple[Any, Dict[str, float], Set[str]]] = {}
+        self._order: Dict[Tuple[str, str], int] = {}
+        self._matcher: Optional[PhraseMatcher] = None
+        self._synced: Optional[Tuple[int, int]] = None
+        self.sync()
+    
+    @staticmethod
+    def _signature(kind: str, entity: Any) -> Any:
+        if kind == "workflows":
+            return entity.slash_command, entity.description
+        if kind == "nodes":
+            return tuple(entity.trigger_on or ()), entity.role
+        if kind == "services":
+            return entity.type
+        return None
+    
+    def _keys(self, kind: str, name: str, entity: Any) -> Tuple[Dict[str, float], Set[str]]:
+        """Phrase weights and description words routing to one entity."""
+        phrases: Dict[str, float] = {}
+        words: Set[str] = set()
+        
+        def add(phrase: Optional[str], weight: float):
+            if phrase:
+                phrase = phrase.lower()
+                phrases[phrase] = max(phrases.get(phrase, 0.0), weight)
+        
+        if kind == "workflows":
+            add(entity.slash_command, 0.95)
+            add(name, 0.85)
+            if entity.description:
+                words = set(entity.description.lower().split())
+        elif kind == "nodes":
+            # Role and name only route nodes that declare no triggers
+            if entity.trigger_on:
+                for trigger in entity.trigger_on:
+                    add(trigger, 0.85)
+            else:
+                add(entity.role, 0.80)
+                add(name, 0.75)
+        elif kind == "tools":
+            add(name.replace('_', ' '), 0.75)
+        elif kind == "services":
+            for keyword in self.SERVICE_KEYWORDS.get(entity.type, []):
+                add(keyword, 0.70)
+        return phrases, words
+    
+    def _add(self, key: Tuple[str, str], signature: Any, entity: Any):
+        phrases, words = self._keys(key[0], key[1], entity)
+        for phrase, weight in phrases.items():
+            if phrase not in self._phrases:
+                self._phrases[phrase] = {}
+                self._matcher = None
+            self._phrases[phrase][key] = weight
+        for word in words:
+            self._words.setdefault(word, set()).add(key[1])
+        self._entries[key] = (signature, phrases, words)
+        self._order.setdefault(key, len(self._order))
+    
+    def _remove(self, key: Tuple[str, str]):
+        _, phrases, words = self._entries.pop(key)
+        for phrase in phrases:
+            postings = self._phrases[phrase]
+            postings.pop(key, None)
+            if not postings:
+                del self._phrases[phrase]
+                self._matcher = None
+        for word in words:
+            names = self._words[word]
+            names.discard(key[1])
+            if not names:
+                del self._words[word]
+    
+    def sync(self) -> int:
+        """Re-index entities added, changed or removed since the last sync; returns how many."""
+        state = (getattr(self.registry, "version", 0), self.registry.get_total_count())
+        if state == self._synced:
+            return 0
+        
+        changed = 0
+        seen = set()
+        for kind in self.KINDS:
+            for name, entity in getattr(self.registry, kind).items():
+                key = (kind, name)
+                seen.add(key)
+                signature = self._signature(kind, entity)
+                indexed = self._entries.get(key)
+                if indexed is not None and indexed[0] == signature:
+                    continue
+                if indexed is not None:
+                    self._remove(key)
+                self._add(key, signature, entity)
+                changed += 1
+        for key in [key for key in self._entries if key not in seen]:
+            self._remove(key)
+            self._order.pop(key, None)
+            changed += 1
+        
+        self._synced = state
+        return changed
+    
+    def rebuild(self):
+        """Drop everything and index the registry from scratch."""
+        self._phrases, self._words, self._entries, self._order = {}, {}, {}, {}
+        self._matcher = None
+        self._synced = None
+        self.sync()
+    
+    def match(self, request: str) -> Dict[str, List[Tuple[str, float]]]:
+        """Matched (name, weight) per kind, in registry order."""
+        if self._matcher is None:
+            self._matcher = PhraseMatcher(self._phrases)
+        
+        weights: Dict[Tuple[str, str], float] = {}
+        for phrase in self._matcher.find(request):
+            for key, weight in self._phrases[phrase].items():
+                weights[key] = max(weights.get(key, 0.0), weight)
+        
+        # Counted in C; cost follows the postings of the request's words only
+        overlap = Counter(chain.from_iterable(
+            self._words.get(word, ()) for word in set(request.lower().split())))
+        for name, count in overlap.items():
+            if count >= self.DESCRIPTION_OVERLAP:
+                key = ("workflows", name)
+                weights[key] = max(weights.get(key, 0.0), 0.75)
+        
+        matches: Dict[str, List[Tuple[str, float]]] = {kind: [] for kind in self.KINDS}
+        for key in sorted(weights, key=self._order.__getitem__):
+            matches[key[0]].append((key[1], weights[key]))
+        return matches
 
 
 class HeadyConductor:
@@ -55,13 +219,24 @@ class HeadyConductor:
     Uses HeadyRegistry to route requests and coordinate execution.
     """
     
-    def __init__(self, root_path: str = None):
+    def __init__(self, root_path: str = None,
+                 retention: Optional[Dict[str, RetentionPolicy]] = None,
+                 compact_interval: float = 3600):
         self.root_path = Path(root_path) if root_path else Path(__file__).parent.parent
         
         # Initialize core components (all indexed in registry)
         self.registry = HeadyRegistry(str(self.root_path))
         self.lens = HeadyLens(registry=self.registry)
-        self.memory = HeadyMemory(str(self.root_path))
+        # Request phrases -> capabilities, refreshed when the registry changes
+        self.routing_index = RoutingIndex(self.registry)
+        # Write-behind keeps memory commits off the orchestration request path;
+        # its queue is bounded and flushed on close() and at interpreter exit.
+        # Retention is opt-in: the compactor only runs when policies are given
+        # (e.g. HeadyMemory.DEFAULT_RETENTION) and never touches other categories.
+        # The semantic tier stays off: its first recall backfills every embedding
+        # inline, which does not fit the recall stage's budget
+        self.memory = HeadyMemory(str(self.root_path), write_behind=True, retention=retention,
+                                  compact_interval=compact_interval if retention else None)
         self.brain = HeadyBrain(
             registry=self.registry,
             lens=self.lens,
@@ -75,8 +250,12 @@ class HeadyConductor:
             "successful_executions": 0,
             "nodes_invoked": 0,
             "workflows_executed": 0,
-            "tools_used": 0
+            "tools_used": 0,
+            # node name -> moving average of invoke latency (s), read by the brain's routing table
+            "node_latency": {}
         }
+        # Latencies measured by earlier runs seed routing until new ones arrive
+        self.execution_stats["node_latency"].update(self._load_node_latency())
         
         # Start monitoring
         self.lens.start_monitoring()
@@ -94,8 +273,6 @@ class HeadyConductor:
         Analyze a user request and determine which capabilities to invoke.
         Returns a structured execution plan with enhanced confidence scoring.
         """
-        request_lower = request.lower()
-        
         execution_plan = {
             "request": request,
             "timestamp": datetime.now().isoformat(),
@@ -107,101 +284,51 @@ class HeadyConductor:
             "conductor_directive": "HeadyConductor is in charge and will optimize execution"
         }
         
-        # Enhanced workflow matching with better confidence
-        for workflow_name, workflow in self.registry.workflows.items():
-            workflow_match = False
-            
-            # Check slash command
-            if workflow.slash_command and workflow.slash_command in request_lower:
-                workflow_match = True
-                execution_plan["confidence"] = max(execution_plan["confidence"], 0.95)
-            
-            # Check workflow name
-            elif workflow_name.lower() in request_lower:
-                workflow_match = True
-                execution_plan["confidence"] = max(execution_plan["confidence"], 0.85)
-            
-            # Check description keywords
-            elif workflow.description:
-                desc_words = workflow.description.lower().split()
-                request_words = request_lower.split()
-                overlap = len(set(desc_words) & set(request_words))
-                if overlap >= 2:  # At least 2 matching words
-                    workflow_match = True
-                    execution_plan["confidence"] = max(execution_plan["confidence"], 0.75)
-            
-            if workflow_match:
-                execution_plan["workflows_to_execute"].append({
-                    "name": workflow.name,
-                    "slash_command": workflow.slash_command,
-                    "file_path": workflow.file_path,
-                    "turbo_enabled": workflow.turbo_enabled,
-                    "conductor_optimized": True
-                })
-        
-        # Enhanced node matching
-        for node_name, node in self.registry.nodes.items():
-            node_match = False
-            
-            if node.trigger_on:
-                for trigger in node.trigger_on:
-                    if trigger.lower() in request_lower:
-                        node_match = True
-                        execution_plan["confidence"] = max(execution_plan["confidence"], 0.85)
-                        break
-            
-            # Check node role/description
-            elif node.role and node.role.lower() in request_lower:
-                node_match = True
-                execution_plan["confidence"] = max(execution_plan["confidence"], 0.80)
-            
-            # Check node name
-            elif node_name.lower() in request_lower:
-                node_match = True
-                execution_plan["confidence"] = max(execution_plan["confidence"], 0.75)
-            
-            if node_match:
-                execution_plan["nodes_to_invoke"].append({
-                    "name": node.name,
-                    "role": node.role,
-                    "primary_tool": node.primary_tool,
-                    "conductor_directed": True,
-                    "optimization_priority": "high"
-                })
-        
-        # Enhanced tool matching
-        for tool_name, tool in self.registry.tools.items():
-            tool_name_words = tool_name.lower().replace('_', ' ')
-            
-            if tool_name_words in request_lower:
-                execution_plan["tools_to_use"].append({
-                    "name": tool.name,
-                    "file_path": tool.file_path,
-                    "category": tool.category,
-                    "conductor_optimized": True
-                })
-                execution_plan["confidence"] = max(execution_plan["confidence"], 0.75)
-        
-        # Service requirement detection
-        service_keywords = {
-            "api": ["api", "endpoint", "request", "server", "service"],
-            "database": ["database", "postgres", "db", "query", "data"],
-            "cache": ["cache", "redis", "memory", "store"],
-            "mcp": ["mcp", "protocol", "connect", "bridge"],
-            "frontend": ["ui", "interface", "web", "frontend", "app"]
-        }
-        
-        for service_name, service in self.registry.services.items():
-            for service_type, keywords in service_keywords.items():
-                if service.type == service_type and any(keyword in request_lower for keyword in keywords):
-                    execution_plan["services_required"].append({
-                        "name": service.name,
-                        "type": service.type,
-                        "endpoint": service.endpoint,
-                        "conductor_managed": True
-                    })
-                    execution_plan["confidence"] = max(execution_plan["confidence"], 0.70)
-                    break
+        # One index lookup per request instead of a scan of the registry
+        self.routing_index.sync()
+        matches = self.routing_index.match(request)
+        
+        for name, weight in matches["workflows"]:
+            workflow = self.registry.workflows[name]
+            execution_plan["workflows_to_execute"].append({
+                "name": workflow.name,
+                "slash_command": workflow.slash_command,
+                "file_path": workflow.file_path,
+                "turbo_enabled": workflow.turbo_enabled,
+                "conductor_optimized": True
+            })
+            execution_plan["confidence"] = max(execution_plan["confidence"], weight)
+        
+        for name, weight in matches["nodes"]:
+            node = self.registry.nodes[name]
+            execution_plan["nodes_to_invoke"].append({
+                "name": node.name,
+                "role": node.role,
+                "primary_tool": node.primary_tool,
+                "conductor_directed": True,
+                "optimization_priority": "high"
+            })
+            execution_plan["confidence"] = max(execution_plan["confidence"], weight)
+        
+        for name, weight in matches["tools"]:
+            tool = self.registry.tools[name]
+            execution_plan["tools_to_use"].append({
+                "name": tool.name,
+                "file_path": tool.file_path,
+                "category": tool.category,
+                "conductor_optimized": True
+            })
+            execution_plan["confidence"] = max(execution_plan["confidence"], weight)
+        
+        for name, weight in matches["services"]:
+            service = self.registry.services[name]
+            execution_plan["services_required"].append({
+                "name": service.name,
+                "type": service.type,
+                "endpoint": service.endpoint,
+                "conductor_managed": True
+            })
+            execution_plan["confidence"] = max(execution_plan["confidence"], weight)
         
         # Apply conductor authority boost
         if execution_plan["confidence"] > 0:
@@ -244,6 +371,7 @@ class HeadyConductor:
             }
         
         node = self.registry.nodes[node_name]
+        started = time.perf_counter()
         
         print(f"\n Invoking Node: {node.name} ({node.role})")
         print(f"  Primary Tool: {node.primary_tool}")
@@ -270,6 +398,8 @@ class HeadyConductor:
         # Update node status back to available
         self.registry.update_node_status(node_name, "available")
         
+        result["duration"] = time.perf_counter() - started
+        self._record_latency(node.name, result["duration"])
         self._log_execution("node", node.name, result)
         return result
     
@@ -372,6 +502,25 @@ class HeadyConductor:
         if len(self.execution_log) > 1000:
             self.execution_log = self.execution_log[-1000:]
     
+    def _load_node_latency(self) -> Dict[str, float]:
+        """Node latencies from the most recently persisted conductor stats."""
+        try:
+            latest = self.memory.latest(category="conductor_stats", source="conductor")
+        except Exception as e:
+            print(f"[WARN] HeadyConductor: could not load node latency: {e}")
+            return {}
+        if latest is None:
+            return {}
+        latency = latest.content.get("node_latency") or {}
+        return {name: float(seconds) for name, seconds in latency.items()
+                if isinstance(seconds, (int, float))}
+    
+    def _record_latency(self, node_name: str, seconds: float, weight: float = 0.2):
+        """Fold one measured invoke latency into the node's moving average."""
+        latency = self.execution_stats["node_latency"]
+        previous = latency.get(node_name)
+        latency[node_name] = seconds if previous is None else previous + weight * (seconds - previous)
+    
     def _update_execution_stats(self, orchestration_result: Dict[str, Any]):
         """Update execution statistics with conductor authority."""
         self.execution_stats["total_orchestrations"] += 1
@@ -395,7 +544,8 @@ class HeadyConductor:
     def get_execution_stats(self) -> Dict[str, Any]:
         """Get current execution statistics."""
         return {
-            "stats": self.execution_stats.copy(),
+            "stats": {**self.execution_stats,
+                      "node_latency": dict(self.execution_stats["node_latency"])},
             "success_rate": (
                 self.execution_stats["successful_executions"] / 
                 max(self.execution_stats["total_orchestrations"], 1)
@@ -529,6 +679,7 @@ def main():
     
     args = parser.parse_args()
     
+    setup_logging()
     conductor = HeadyConductor()
     
     if args.summary:
@@ -35,13 +35,85 @@
 import os
 import sys
 import json
+import base64
+import asyncio
 import sqlite3
 import hashlib
+import queue
+import threading
+import atexit
+import heapq
+import math
+import re
+import zlib
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
-from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple, Iterator, AsyncIterator, Iterable, IO, Union
+from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    print("[WARN] HeadyMemory: numpy not available, semantic recall uses pure-Python scoring")
+
+# Large payloads use zstd when installed; zlib is always available
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+def memory_rowid(mem_id: str) -> int:
+    """
+    Map a 16-hex-digit memory ID onto a stable signed 64-bit SQLite rowid.
+    The mapping is a bijection, so the rowid never changes across re-stores
+    and can key the FTS table without an extra lookup.
+    """
+    value = int(mem_id, 16)
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def memory_id(rowid: int) -> str:
+    """Inverse of memory_rowid."""
+    return format(rowid & 0xFFFFFFFFFFFFFFFF, "016x")
+
+
+def searchable_text(value: Any) -> str:
+    """Flatten string values of a JSON document into full-text searchable text."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return " ".join(filter(None, (searchable_text(v) for v in value.values())))
+    if isinstance(value, (list, tuple)):
+        return " ".join(filter(None, (searchable_text(v) for v in value)))
+    return ""
+
+
+def compress_payload(data: bytes) -> Tuple[str, bytes]:
+    """Compress a serialized payload, returning (codec, data)."""
+    if ZSTD_AVAILABLE:
+        codec, packed = "zstd", zstandard.ZstdCompressor(level=3).compress(data)
+    else:
+        codec, packed = "zlib", zlib.compress(data, 6)
+    return (codec, packed) if len(packed) < len(data) else ("raw", data)
+
+
+def decode_content(codec: str, data) -> Any:
+    """Decode memory content stored inline ('json') or as a compressed payload."""
+    if codec == "json":
+        return json.loads(data)
+    if codec == "zlib":
+        data = zlib.decompress(data)
+    elif codec == "zstd":
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return json.loads(data)
+
 
 @dataclass
 class MemoryEntry:
@@ -56,6 +128,443 @@ class MemoryEntry:
     last_accessed: Optional[str] = None
 
 
+class LazyMemoryEntry(MemoryEntry):
+    """MemoryEntry whose content is decoded from its stored form on first access."""
+    
+    def __init__(self, codec: str, data, **fields):
+        super().__init__(content=None, **fields)
+        self._encoded = (codec, data)
+    
+    @property
+    def content(self) -> Dict[str, Any]:
+        if self._encoded is not None:
+            self._content = decode_content(*self._encoded)
+            self._encoded = None
+        return self._content
+    
+    @content.setter
+    def content(self, value: Dict[str, Any]):
+        self._content = value
+        self._encoded = None
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Retention rules for one memory category, enforced by HeadyMemory.compact.
+    The newest keep_latest rows survive the TTL; max_rows caps the category.
+    """
+    ttl_days: Optional[float] = None
+    max_rows: Optional[int] = None
+    keep_latest: int = 0
+
+
+class SQLiteConnectionPool:
+    """
+    Thread-safe pool of persistent SQLite connections.
+    Connections are opened lazily up to pool_size, tuned once with WAL
+    journaling and cache pragmas, and keep their prepared-statement cache
+    alive between calls instead of paying connection setup every time.
+    """
+    
+    PRAGMAS = (
+        "PRAGMA auto_vacuum=INCREMENTAL",  # Only takes effect on new databases
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-16000",      # ~16 MB page cache per connection
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=67108864",     # 64 MB memory-mapped I/O
+    )
+    
+    def __init__(self, db_path: Path, pool_size: int = 4, timeout: float = 30.0,
+                 cached_statements: int = 256):
+        self.db_path = db_path
+        self.pool_size = max(pool_size, 1)
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+    
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+            if len(self._all) < self.pool_size:
+                conn = self._open()
+                self._all.append(conn)
+                return conn
+        
+        # Pool exhausted - wait for a connection to be released
+        return self._idle.get(timeout=self.timeout)
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection; commits on success, rolls back on error."""
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+    
+    def close(self):
+        """Close every pooled connection."""
+        with self._lock:
+            self._closed = True
+            connections, self._all = self._all, []
+        
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get pool statistics."""
+        return {
+            "pool_size": self.pool_size,
+            "open_connections": len(self._all),
+            "idle_connections": self._idle.qsize()
+        }
+
+
+class HashingEmbedder:
+    """
+    Deterministic hashing-vectorizer embedder; needs no model download.
+    Words and their character trigrams are hashed (CRC32, stable across
+    processes) into a signed, L2-normalized float32 vector, so paraphrases
+    that share word stems land close together.
+    Any object with a `dim` attribute and an `embed(texts)` method returning
+    one float sequence per text can be plugged in instead.
+    """
+    
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+    
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+    
+    def embed(self, texts: List[str]) -> List[array]:
+        return [self._embed_one(text) for text in texts]
+    
+    def _embed_one(self, text: str) -> array:
+        vector = array("f", bytes(4 * self.dim))
+        for word in self.TOKEN_PATTERN.findall(text.lower()):
+            features = [word]
+            padded = f"<{word}>"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+            for feature in features:
+                h = zlib.crc32(feature.encode())
+                vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm:
+            for i in range(self.dim):
+                vector[i] /= norm
+        return vector
+
+
+class VectorStore:
+    """
+    In-memory float32 matrix of memory embeddings keyed by rowid.
+    Uses a growable NumPy matrix and one matrix product per query batch when
+    NumPy is available, falling back to pure-Python dot products otherwise.
+    """
+    
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._rowids = array("q")
+        self._positions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        if NUMPY_AVAILABLE:
+            self._matrix = np.zeros((0, dim), dtype=np.float32)
+        else:
+            self._rows: List[array] = []
+    
+    def __len__(self) -> int:
+        return len(self._rowids)
+    
+    def _normalize(self, vector) -> array:
+        vector = array("f", vector)
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm and abs(norm - 1.0) > 1e-6:
+            for i in range(len(vector)):
+                vector[i] /= norm
+        return vector
+    
+    def upsert(self, rowid: int, vector):
+        """Insert or replace the embedding for rowid."""
+        vector = self._normalize(vector)
+        with self._lock:
+            pos = self._positions.get(rowid)
+            if pos is None:
+                pos = len(self._rowids)
+                self._positions[rowid] = pos
+                self._rowids.append(rowid)
+                if NUMPY_AVAILABLE:
+                    if pos >= self._matrix.shape[0]:
+                        grown = np.zeros((max(64, 2 * self._matrix.shape[0]), self.dim), dtype=np.float32)
+                        grown[:pos] = self._matrix[:pos]
+                        self._matrix = grown
+                else:
+                    self._rows.append(vector)
+                    return
+            if NUMPY_AVAILABLE:
+                self._matrix[pos] = np.frombuffer(vector.tobytes(), dtype=np.float32)
+            else:
+                self._rows[pos] = vector
+    
+    def remove(self, rowids: List[int]):
+        """Drop embeddings (swap-with-last keeps the matrix dense)."""
+        with self._lock:
+            for rowid in rowids:
+                pos = self._positions.pop(rowid, None)
+                if pos is None:
+                    continue
+                last = len(self._rowids) - 1
+                if pos != last:
+                    moved = self._rowids[last]
+                    self._rowids[pos] = moved
+                    self._positions[moved] = pos
+                    if NUMPY_AVAILABLE:
+                        self._matrix[pos] = self._matrix[last]
+                    else:
+                        self._rows[pos] = self._rows[last]
+                self._rowids.pop()
+                if not NUMPY_AVAILABLE:
+                    self._rows.pop()
+    
+    def top_k(self, queries: List[Any], k: int) -> List[List[Tuple[int, float]]]:
+        """Batched cosine top-k: one [(rowid, similarity), ...] list per query vector."""
+        queries = [self._normalize(q) for q in queries]
+        with self._lock:
+            n = len(self._rowids)
+            rowids = array("q", self._rowids)
+            if NUMPY_AVAILABLE:
+                matrix = self._matrix[:n].copy()
+            else:
+                rows = list(self._rows)
+        if not n or k <= 0:
+            return [[] for _ in queries]
+        k = min(k, n)
+        
+        results = []
+        if NUMPY_AVAILABLE:
+            q = np.frombuffer(b"".join(v.tobytes() for v in queries), dtype=np.float32)
+            scores = q.reshape(len(queries), self.dim) @ matrix.T
+            for row in scores:
+                top = np.argpartition(-row, k - 1)[:k]
+                top = top[np.argsort(-row[top])]
+                results.append([(rowids[i], float(row[i])) for i in top])
+        else:
+            for vector in queries:
+                scored = [(sum(a * b for a, b in zip(vector, row)), i) for i, row in enumerate(rows)]
+                results.append([(rowids[i], score) for score, i in heapq.nlargest(k, scored)])
+        return results
+
+
+def intersect_postings(a: "array", b: "array") -> "array":
+    """Intersect two sorted rowid postings; gallops through the larger one."""
+    if len(a) > len(b):
+        a, b = b, a
+    result = array("q")
+    if not a:
+        return result
+    
+    if len(b) > 8 * len(a):
+        lo = 0
+        for rowid in a:
+            lo = bisect_left(b, rowid, lo)
+            if lo == len(b):
+                break
+            if b[lo] == rowid:
+                result.append(rowid)
+        return result
+    
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] < b[j]:
+            i += 1
+        elif a[i] > b[j]:
+            j += 1
+        else:
+            result.append(a[i])
+            i += 1
+            j += 1
+    return result
+
+
+def union_postings(postings: List["array"]) -> "array":
+    """Union of sorted rowid postings, still sorted and de-duplicated."""
+    postings = [p for p in postings if p]
+    if len(postings) == 1:
+        return array("q", postings[0])
+    result = array("q")
+    for rowid in heapq.merge(*postings):
+        if not result or result[-1] != rowid:
+            result.append(rowid)
+    return result
+
+
+class MemoryIndex:
+    """
+    Lazily loaded view of one persisted posting index (category, tag or source).
+    Postings live in the memory_index table and are maintained incrementally on
+    store, so nothing is scanned at startup; a key's postings are only read
+    from SQLite the first time a query needs them, then kept current in memory
+    as sorted array('q') rowids (8 bytes per posting, O(log n) membership).
+    The store-path heuristics only need a key's first few postings; those are
+    read once per key and likewise kept current.
+    """
+    
+    # Leading postings kept per key for head() and has_at_least()
+    HEAD_SIZE = 8
+    
+    def __init__(self, memory: "HeadyMemory", kind: str):
+        self.memory = memory
+        self.kind = kind
+        self._postings: Dict[str, array] = {}
+        self._heads: Dict[str, array] = {}
+        self._lock = threading.Lock()
+    
+    def cached(self, key: str) -> Optional[array]:
+        """Postings for key if already loaded, without touching SQLite."""
+        return self._postings.get(key)
+    
+    def rowids(self, key: str) -> array:
+        """Sorted rowids posted under key (do not mutate)."""
+        return self._load(key)
+    
+    def get(self, key: str, default: Optional[List[str]] = None) -> List[str]:
+        """Get all memory IDs posted under key."""
+        postings = self._load(key)
+        if not postings:
+            return default if default is not None else []
+        return [memory_id(rowid) for rowid in postings]
+    
+    def __getitem__(self, key: str) -> List[str]:
+        ids = self.get(key)
+        if not ids:
+            raise KeyError(key)
+        return ids
+    
+    def __contains__(self, key: str) -> bool:
+        return self.has_at_least(key, 1)
+    
+    def __len__(self) -> int:
+        """Number of distinct keys in the index."""
+        self.memory._flush_for_read()
+        with self.memory._connection() as conn:
+            cursor = conn.execute(
+                "SELECT COUNT(*) FROM (SELECT DISTINCT key FROM memory_index WHERE kind = ?)",
+                (self.kind,)
+            )
+            return cursor.fetchone()[0]
+    
+    def head(self, key: str, n: int) -> List[str]:
+        """
+        First n memory IDs posted under key, without loading the full posting list.
+        Used by the store-path heuristics, so it does not force a write-behind flush:
+        up to HEAD_SIZE postings are read once per key (before the key's first
+        store in this process), then maintained by add().
+        """
+        postings = self._postings.get(key)
+        if postings is None:
+            postings = self._heads.get(key) if n <= self.HEAD_SIZE else None
+        if postings is None:
+            postings = self._read_head(key, max(n, self.HEAD_SIZE))
+            if n <= self.HEAD_SIZE:
+                with self._lock:
+                    postings = self._heads.setdefault(key, postings)
+        return [memory_id(rowid) for rowid in postings[:n]]
+    
+    def _read_head(self, key: str, n: int) -> array:
+        with self.memory._connection() as conn:
+            cursor = conn.execute(
+                "SELECT mem_rowid FROM memory_index WHERE kind = ? AND key = ? LIMIT ?",
+                (self.kind, key, n)
+            )
+            return array("q", (rowid for (rowid,) in cursor.fetchall()))
+    
+    def has_at_least(self, key: str, n: int) -> bool:
+        """Whether key has at least n postings; reads at most n index entries."""
+        postings = self._postings.get(key)
+        if postings is not None:
+            return len(postings) >= n
+        return len(self.head(key, n)) >= n
+    
+    def add(self, key: str, mem_id: str):
+        """Record a new posting in the cached list (the table is written with the row)."""
+        rowid = memory_rowid(mem_id)
+        with self._lock:
+            postings = self._postings.get(key)
+            if postings is not None:
+                pos = bisect_left(postings, rowid)
+                if pos == len(postings) or postings[pos] != rowid:
+                    postings.insert(pos, rowid)
+            head = self._heads.get(key)
+            if head is not None:
+                pos = bisect_left(head, rowid)
+                if pos < self.HEAD_SIZE and (pos == len(head) or head[pos] != rowid):
+                    head.insert(pos, rowid)
+                    del head[self.HEAD_SIZE:]
+    
+    def invalidate(self):
+        """Drop cached postings so they are re-read from SQLite."""
+        with self._lock:
+            self._postings.clear()
+            self._heads.clear()
+    
+    def _load(self, key: str) -> array:
+        postings = self._postings.get(key)
+        if postings is not None:
+            return postings
+        
+        with self._lock:
+            if key in self._postings:
+                return self._postings[key]
+            self.memory._flush_for_read()
+            with self.memory._connection() as conn:
+                # Primary-key order, so postings arrive sorted by rowid
+                cursor = conn.execute(
+                    "SELECT mem_rowid FROM memory_index WHERE kind = ? AND key = ?",
+                    (self.kind, key)
+                )
+                postings = array("q", (rowid for (rowid,) in cursor.fetchall()))
+            self._postings[key] = postings
+            return postings
+
+
 class HeadyMemory:
     """
     MEMORY - The Eternal Archive
@@ -63,20 +572,72 @@ class HeadyMemory:
     Indexed in HeadyRegistry as a core system node.
     """
     
-    def __init__(self, root_path: str = None):
+    # Stay well below SQLite's default host-parameter limit (999)
+    SQL_BATCH_SIZE = 500
+    
+    # PRAGMA user_version of the current schema
+    SCHEMA_VERSION = 3
+    
+    # Characters of flattened content embedded for semantic recall
+    EMBED_TEXT_LIMIT = 4096
+    
+    # Serialized content at least this large moves to memory_payloads, compressed
+    # and deduplicated by hash; smaller content stays inline as JSON
+    COMPRESS_THRESHOLD = 1024
+    
+    # Resolves memories m to (codec, data) for decode_content
+    CONTENT_COLUMNS = "COALESCE(p.codec, 'json'), COALESCE(p.data, m.content)"
+    PAYLOAD_JOIN = "LEFT JOIN memory_payloads p ON p.digest = m.payload_digest"
+    
+    # Row layout consumed by _entries_from_rows
+    ENTRY_COLUMNS = (f"m.id, m.category, {CONTENT_COLUMNS}, m.tags, m.timestamp, "
+                     f"m.source, m.relevance_score, m.access_count, m.last_accessed")
+    
+    # Query result order; the keyset cursor compares on the same columns
+    QUERY_ORDER = "m.relevance_score DESC, m.timestamp DESC, m.rowid DESC"
+    
+    # Suggested policies for per-request categories that would otherwise grow
+    # without bound; retention is opt-in, so callers pass these explicitly
+    DEFAULT_RETENTION = {
+        "processing_context": RetentionPolicy(ttl_days=30, max_rows=10000, keep_latest=100),
+        "learning_insights": RetentionPolicy(ttl_days=90, max_rows=10000, keep_latest=100),
+        "orchestration": RetentionPolicy(ttl_days=30, max_rows=10000, keep_latest=100),
+        "conductor_stats": RetentionPolicy(ttl_days=7, max_rows=100, keep_latest=1),
+    }
+    
+    # Free pages returned to the filesystem per compaction pass
+    VACUUM_PAGES_PER_PASS = 2048
+    
+    # Change-feed entries kept by compaction for subscribers catching up
+    CHANGE_FEED_RETENTION = 100000
+    
+    def __init__(self, root_path: str = None, pool_size: int = 4,
+                 write_behind: bool = False, flush_interval: float = 1.0,
+                 flush_batch_size: int = 256, max_pending: int = 10000,
+                 semantic: bool = False, embedder=None,
+                 retention: Optional[Dict[str, RetentionPolicy]] = None,
+                 compact_interval: Optional[float] = None):
         self.root_path = Path(root_path) if root_path else Path(__file__).parent.parent
         self.db_path = self.root_path / ".heady" / "memory.db"
         
         # Ensure directory exists
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # Persistent connection pool shared by all public methods
+        self.pool = SQLiteConnectionPool(self.db_path, pool_size=pool_size)
+        
+        # Optional semantic tier: embeddings persisted in SQLite, matrix built lazily
+        self.embedder = (embedder or HashingEmbedder()) if semantic else None
+        self._vectors: Optional[VectorStore] = None
+        self._vectors_lock = threading.Lock()
+        
         # Initialize database
         self._init_database()
         
-        # In-memory indexes for fast access
-        self.category_index: Dict[str, List[str]] = {}
-        self.tag_index: Dict[str, List[str]] = {}
-        self.source_index: Dict[str, List[str]] = {}
+        # Persisted indexes, loaded lazily per key
+        self.category_index = MemoryIndex(self, "category")
+        self.tag_index = MemoryIndex(self, "tag")
+        self.source_index = MemoryIndex(self, "source")
         
         # Learning and optimization features
         self.learning_metrics = {
@@ -92,97 +653,458 @@ class HeadyMemory:
         self.knowledge_connections = {}
         self.learning_patterns = {}
         
-        # Build indexes
-        self._build_indexes()
+        # Change feed: subscribers wait on the condition for newly committed seqs
+        self._changes = threading.Condition()
+        self._latest_seq = self._read_latest_seq()
+        self._closed = False
+        
+        # Write-behind queue: stores are buffered and committed in batches.
+        # At max_pending queued records the storing thread flushes inline
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.flush_batch_size = max(flush_batch_size, 1)
+        self.max_pending = max(max_pending, 1)
+        self._pending: Dict[str, Tuple] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._flusher_active = False
+        self._flusher = None
+        self.write_behind_stats = {"flushes": 0, "records_flushed": 0, "flush_errors": 0,
+                                   "inline_flushes": 0}
+        if write_behind:
+            self._start_flusher()
+        
+        # Retention: only the categories given are ever compacted; compaction runs
+        # on demand or periodically in the background when compact_interval is set
+        self.retention = dict(retention or {})
+        self.compact_interval = compact_interval
+        self._compact_lock = threading.Lock()
+        self._compactor_wakeup = threading.Event()
+        self._compactor_active = False
+        self._compactor = None
+        self._vacuum_skip_logged = False
+        self.compaction_stats = {"runs": 0, "rows_deleted": 0, "pages_vacuumed": 0,
+                                 "last_run": None, "errors": 0}
+        if compact_interval:
+            self._start_compactor()
         
         print("MEMORY: Initialized - Enhanced Eternal Archive with Learning")
         print("  + Intelligent caching enabled")
         print("  + Knowledge connection tracking active")
         print("  + Learning pattern recognition ready")
         print("  + Adaptive optimization online")
+        print(f"  + Connection pool: {self.pool.pool_size} connections (WAL)")
+        if write_behind:
+            print(f"  + Write-behind: batches of {self.flush_batch_size}, every {flush_interval}s, "
+                  f"at most {self.max_pending} pending")
+        if self.embedder:
+            print(f"  + Semantic recall: {type(self.embedder).__name__} ({self.embedder.dim} dims)")
+        if compact_interval:
+            print(f"  + Retention compactor: {len(self.retention)} policies, every {compact_interval}s")
+    
+    def _connection(self):
+        """Borrow a pooled connection (transaction committed on exit)."""
+        return self.pool.connection()
+    
+    def close(self):
+        """Flush pending writes and release pooled database connections."""
+        with self._changes:
+            self._closed = True
+            self._changes.notify_all()
+        if self._compactor_active:
+            self._compactor_active = False
+            self._compactor_wakeup.set()
+            self._compactor.join(timeout=5)
+        if self._flusher_active:
+            self._flusher_active = False
+            self._flush_requested.set()
+            self._flusher.join(timeout=5)
+            atexit.unregister(self.close)
+        self.flush()
+        self.pool.close()
+    
+    def _start_flusher(self):
+        """Start the background write-behind flusher."""
+        self._flusher_active = True
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        
+        # Durability on interpreter shutdown
+        atexit.register(self.close)
+    
+    def _flush_loop(self):
+        """Background loop flushing the write-behind queue by size or time."""
+        while self._flusher_active:
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[WARN] HeadyMemory: write-behind flush failed: {e}")
+    
+    def flush(self) -> int:
+        """Commit all queued write-behind stores in one transaction. Returns records written."""
+        with self._flush_lock:
+            with self._pending_lock:
+                if not self._pending:
+                    return 0
+                records, self._pending = list(self._pending.values()), {}
+            
+            try:
+                with self._connection() as conn:
+                    seq = self._write_memories(conn.cursor(), records)
+            except Exception:
+                # Re-queue so nothing is lost; newer stores of the same ID win
+                with self._pending_lock:
+                    self._pending = {**{r[0]: r for r in records}, **self._pending}
+                self.write_behind_stats["flush_errors"] += 1
+                raise
+            
+            self.write_behind_stats["flushes"] += 1
+            self.write_behind_stats["records_flushed"] += len(records)
+            self._publish(seq)
+            return len(records)
+    
+    def _flush_for_read(self):
+        """Make queued writes visible before reading from SQLite."""
+        if self.write_behind:
+            self.flush()
+    
+    def _flush_for_search(self, term_sets: List[List[str]]):
+        """
+        Flush before a full-text search only if a queued record could match it.
+        The test is a superset of FTS matching: every word of some term occurs
+        in the record's serialized content or tags (terms JSON would escape
+        always flush).
+        """
+        if not self.write_behind:
+            return
+        terms = [term.lower().split() for terms in term_sets for term in terms]
+        if any(not word.isascii() or '"' in word or "\\" in word
+               for words in terms for word in words):
+            self.flush()
+            return
+        # Holding the flush lock waits out an in-flight flush, whose records are
+        # neither pending nor committed yet
+        with self._flush_lock, self._pending_lock:
+            texts = [f"{record[2]} {' '.join(record[3])}".lower()
+                     for record in self._pending.values()]
+        if any(all(word in text for word in words) for text in texts for words in terms):
+            self.flush()
+    
+    def _start_compactor(self):
+        """Start the background retention compactor."""
+        self._compactor_active = True
+        self._compactor = threading.Thread(target=self._compact_loop, daemon=True)
+        self._compactor.start()
+    
+    def _compact_loop(self):
+        """Background loop enforcing retention every compact_interval seconds."""
+        while self._compactor_active:
+            self._compactor_wakeup.wait(self.compact_interval)
+            if not self._compactor_active:
+                break
+            try:
+                self.compact()
+            except Exception as e:
+                self.compaction_stats["errors"] += 1
+                print(f"[WARN] HeadyMemory: compaction failed: {e}")
+    
+    def compact(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Enforce retention policies: delete expired and surplus rows with their
+        full-text, index and vector entries, then reclaim free pages incrementally.
+        """
+        now = now or datetime.now()
+        with self._compact_lock:
+            self._flush_for_read()
+            deleted: Dict[str, int] = {}
+            seq = None
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                for category, policy in self.retention.items():
+                    rowids = self._expired_rowids(cursor, category, policy, now)
+                    if rowids:
+                        seq = self._delete_rowids(cursor, rowids)
+                        deleted[category] = len(rowids)
+                        print(f"MEMORY: Compaction deleted {len(rowids)} '{category}' memories ({policy})")
+                cursor.execute("DELETE FROM memory_changes WHERE seq <= ?",
+                               (self._latest_seq - self.CHANGE_FEED_RETENTION,))
+                if deleted:
+                    # Payloads no longer referenced by any memory
+                    cursor.execute("""
+                        DELETE FROM memory_payloads WHERE NOT EXISTS (
+                            SELECT 1 FROM memories WHERE payload_digest = memory_payloads.digest
+                        )
+                    """)
+            
+            rows_deleted = sum(deleted.values())
+            if rows_deleted:
+                self._publish(seq)
+                self._forget_deleted()
+            pages = self._vacuum_incremental(merge_fts=rows_deleted > 0)
+            
+            self.compaction_stats["runs"] += 1
+            self.compaction_stats["rows_deleted"] += rows_deleted
+            self.compaction_stats["pages_vacuumed"] += pages
+            self.compaction_stats["last_run"] = now.isoformat()
+            return {"deleted": deleted, "rows_deleted": rows_deleted, "pages_vacuumed": pages}
+    
+    @staticmethod
+    def _expired_rowids(cursor: sqlite3.Cursor, category: str, policy: RetentionPolicy,
+                        now: datetime) -> List[int]:
+        """Rowids in category that fall outside its retention policy."""
+        expired = set()
+        newest_first = "FROM memories WHERE category = ? ORDER BY timestamp DESC, rowid DESC"
+        if policy.ttl_days is not None:
+            cutoff = (now - timedelta(days=policy.ttl_days)).isoformat()
+            cursor.execute(
+                f"SELECT rowid, timestamp {newest_first} LIMIT -1 OFFSET ?",
+                (category, max(policy.keep_latest, 0))
+            )
+            expired.update(rowid for rowid, timestamp in cursor.fetchall() if timestamp < cutoff)
+        if policy.max_rows is not None:
+            cursor.execute(f"SELECT rowid {newest_first} LIMIT -1 OFFSET ?",
+                           (category, max(policy.max_rows, 0)))
+            expired.update(rowid for (rowid,) in cursor.fetchall())
+        return sorted(expired)
+    
+    def _delete_rowids(self, cursor: sqlite3.Cursor, rowids: List[int]) -> int:
+        """Delete memories and every derived row keyed by their rowids. Returns the last change seq."""
+        changed_at = datetime.now().isoformat()
+        tables = [("memories", "rowid"), ("memory_index", "mem_rowid"),
+                  ("memory_vectors", "mem_rowid")]
+        if self.fts_enabled:
+            tables.append(("memories_fts", "rowid"))
+        for start in range(0, len(rowids), self.SQL_BATCH_SIZE):
+            chunk = rowids[start:start + self.SQL_BATCH_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f"""
+                INSERT INTO memory_changes (mem_id, category, op, timestamp)
+                SELECT id, category, 'delete', ? FROM memories WHERE rowid IN ({placeholders})
+            """, [changed_at, *chunk])
+            for table, column in tables:
+                cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", chunk)
+        
+        with self._vectors_lock:
+            if self._vectors is not None:
+                self._vectors.remove(rowids)
+        
+        cursor.execute("SELECT last_insert_rowid()")
+        return cursor.fetchone()[0]
+    
+    def _forget_deleted(self):
+        """Drop in-memory state that may reference deleted memories."""
+        for index in (self.category_index, self.tag_index, self.source_index):
+            index.invalidate()
+        if not self.knowledge_connections:
+            return
+        
+        with self._connection() as conn:
+            live = {memory_id(rowid) for (rowid,) in conn.execute("SELECT rowid FROM memories")}
+        self.knowledge_connections = {
+            mem_id: [c for c in connections if c in live]
+            for mem_id, connections in self.knowledge_connections.items() if mem_id in live
+        }
+    
+    def _vacuum_incremental(self, merge_fts: bool = False) -> int:
+        """Return up to VACUUM_PAGES_PER_PASS free pages to the filesystem."""
+        with self._connection() as conn:
+            if merge_fts and self.fts_enabled:
+                conn.execute("INSERT INTO memories_fts (memories_fts) VALUES ('optimize')")
+                conn.commit()
+            
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # Legacy databases need the blocking rebuild in enable_incremental_vacuum()
+                if not self._vacuum_skip_logged:
+                    self._vacuum_skip_logged = True
+                    print("[WARN] HeadyMemory: incremental vacuum unavailable on this database; "
+                          "run enable_incremental_vacuum() to migrate")
+                return 0
+            
+            free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            # executescript steps the pragma to completion (execute frees a single page)
+            conn.executescript(f"PRAGMA incremental_vacuum({self.VACUUM_PAGES_PER_PASS})")
+            conn.execute("PRAGMA optimize")
+            return free_before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+    
+    def enable_incremental_vacuum(self) -> bool:
+        """
+        One-off migration for databases created before incremental vacuum:
+        rebuilds the file with a full VACUUM, blocking other writers while it runs.
+        Returns True if a rebuild was needed.
+        """
+        with self._compact_lock, self._connection() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        print("MEMORY: Migrated database to incremental vacuum")
+        return True
     
     def _init_database(self):
         """Initialize SQLite database with Heady schema."""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        # Main memory table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS memories (
-                id TEXT PRIMARY KEY,
-                category TEXT NOT NULL,
-                content TEXT NOT NULL,
-                tags TEXT NOT NULL,
-                timestamp TEXT NOT NULL,
-                source TEXT NOT NULL,
-                relevance_score REAL DEFAULT 1.0,
-                access_count INTEGER DEFAULT 0,
-                last_accessed TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Indexes for performance
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_category ON memories(category)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON memories(timestamp)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_source ON memories(source)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_relevance ON memories(relevance_score)")
-        
-        # External sources table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS external_sources (
-                id TEXT PRIMARY KEY,
-                source_type TEXT NOT NULL,
-                source_url TEXT,
-                content TEXT NOT NULL,
-                comparative_analysis TEXT,
-                integrated_at TEXT NOT NULL,
-                relevance_score REAL DEFAULT 1.0
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            
+            # Main memory table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS memories (
+                    id TEXT PRIMARY KEY,
+                    category TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    tags TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    relevance_score REAL DEFAULT 1.0,
+                    access_count INTEGER DEFAULT 0,
+                    last_accessed TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    payload_digest TEXT
+                )
+            """)
+            
+            # Indexes for performance
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_category ON memories(category)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON memories(timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_source ON memories(source)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_category_timestamp ON memories(category, timestamp)")
+            
+            # Cover the query() ordering, globally and within a category
+            cursor.execute("DROP INDEX IF EXISTS idx_relevance")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_relevance_timestamp ON memories(relevance_score, timestamp)")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_category_relevance "
+                "ON memories(category, relevance_score, timestamp)"
             )
-        """)
-        
-        # User preferences table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS user_preferences (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL,
-                category TEXT,
-                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            
+            # External sources table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS external_sources (
+                    id TEXT PRIMARY KEY,
+                    source_type TEXT NOT NULL,
+                    source_url TEXT,
+                    content TEXT NOT NULL,
+                    comparative_analysis TEXT,
+                    integrated_at TEXT NOT NULL,
+                    relevance_score REAL DEFAULT 1.0
+                )
+            """)
+            
+            # User preferences table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS user_preferences (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    category TEXT,
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Full-text index over memory content and tags (rowid == memories.rowid)
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'memories_fts'")
+            fts_existed = cursor.fetchone() is not None
+            try:
+                cursor.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts
+                    USING fts5(content, tags, tokenize='porter unicode61')
+                """)
+                self.fts_enabled = True
+            except sqlite3.OperationalError:
+                print("[WARN] HeadyMemory: SQLite FTS5 not available, search uses tag index")
+                self.fts_enabled = False
+            
+            # Persisted category/tag/source postings (replaces startup index rebuild)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS memory_index (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    mem_rowid INTEGER NOT NULL,
+                    PRIMARY KEY (kind, key, mem_rowid)
+                ) WITHOUT ROWID
+            """)
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_memory_index_rowid ON memory_index(mem_rowid)"
             )
-        """)
-        
-        conn.commit()
-        conn.close()
-    
-    def _build_indexes(self):
-        """Build in-memory indexes for fast retrieval."""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        # Build category index
-        cursor.execute("SELECT id, category FROM memories")
-        for mem_id, category in cursor.fetchall():
-            if category not in self.category_index:
-                self.category_index[category] = []
-            self.category_index[category].append(mem_id)
-        
-        # Build tag index
-        cursor.execute("SELECT id, tags FROM memories")
-        for mem_id, tags_str in cursor.fetchall():
-            tags = json.loads(tags_str)
-            for tag in tags:
-                if tag not in self.tag_index:
-                    self.tag_index[tag] = []
-                self.tag_index[tag].append(mem_id)
-        
-        # Build source index
-        cursor.execute("SELECT id, source FROM memories")
-        for mem_id, source in cursor.fetchall():
-            if source not in self.source_index:
-                self.source_index[source] = []
-            self.source_index[source].append(mem_id)
-        
-        conn.close()
+            
+            # Compressed large contents, shared by every memory with the same payload
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS memory_payloads (
+                    digest TEXT PRIMARY KEY,
+                    codec TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    size INTEGER NOT NULL
+                )
+            """)
+            
+            # Change feed: one row per committed store or delete, in commit order
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS memory_changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    mem_id TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    op TEXT NOT NULL,
+                    timestamp TEXT NOT NULL
+                )
+            """)
+            
+            # Embeddings for the optional semantic tier
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS memory_vectors (
+                    mem_rowid INTEGER PRIMARY KEY,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL
+                )
+            """)
+            
+            cursor.execute("PRAGMA user_version")
+            version = cursor.fetchone()[0]
+            if version < 1:
+                # Re-key legacy rows onto rowids derived from their memory IDs
+                cursor.execute("SELECT id FROM memories")
+                cursor.executemany(
+                    "UPDATE memories SET rowid = ? WHERE id = ?",
+                    [(memory_rowid(mem_id), mem_id) for (mem_id,) in cursor.fetchall()]
+                )
+            if version < 2:
+                # One-time backfill of the persisted indexes
+                cursor.execute("SELECT rowid, category, tags, source FROM memories")
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO memory_index (kind, key, mem_rowid) VALUES (?, ?, ?)",
+                    (posting for rowid, category, tags, source in cursor.fetchall()
+                     for posting in self._postings_for(rowid, category, json.loads(tags), source))
+                )
+            if version < 3:
+                # Move existing large contents into compressed payloads
+                cursor.execute("PRAGMA table_info(memories)")
+                if "payload_digest" not in {column[1] for column in cursor.fetchall()}:
+                    cursor.execute("ALTER TABLE memories ADD COLUMN payload_digest TEXT")
+                cursor.execute("SELECT rowid FROM memories WHERE length(content) >= ?",
+                               (self.COMPRESS_THRESHOLD,))
+                large = [rowid for (rowid,) in cursor.fetchall()]
+                for start in range(0, len(large), self.SQL_BATCH_SIZE):
+                    chunk = large[start:start + self.SQL_BATCH_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor.execute(f"SELECT rowid, content FROM memories WHERE rowid IN ({placeholders})",
+                                   chunk)
+                    rows = cursor.fetchall()
+                    digests = self._write_payloads(cursor, [content for _, content in rows])
+                    cursor.executemany(
+                        "UPDATE memories SET content = '', payload_digest = ? WHERE rowid = ?",
+                        [(digest, rowid) for (rowid, _), digest in zip(rows, digests)]
+                    )
+            cursor.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_payload_digest ON memories(payload_digest)")
+            
+            if self.fts_enabled and not fts_existed:
+                cursor.execute(f"SELECT m.rowid, {self.CONTENT_COLUMNS}, m.tags "
+                               f"FROM memories m {self.PAYLOAD_JOIN}")
+                cursor.executemany(
+                    "INSERT INTO memories_fts (rowid, content, tags) VALUES (?, ?, ?)",
+                    [(rowid, searchable_text(decode_content(codec, data)), " ".join(json.loads(tags)))
+                     for rowid, codec, data, tags in cursor.fetchall()]
+                )
     
     def store(self, category: str, content: Dict[str, Any], tags: List[str] = None, 
               source: str = "system", relevance_score: float = 1.0) -> str:
@@ -201,34 +1123,33 @@ class HeadyMemory:
         # Learning: Update relevance score based on patterns
         enhanced_relevance_score = self._calculate_enhanced_relevance(category, tags, relevance_score)
         
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO memories 
-            (id, category, content, tags, timestamp, source, relevance_score, access_count, last_accessed)
-            VALUES (?, ?, ?, ?, ?, ?, ?, 0, NULL)
-        """, (mem_id, category, json.dumps(content), json.dumps(tags), timestamp, source, enhanced_relevance_score))
-        
-        conn.commit()
-        conn.close()
-        
-        # Update indexes
-        if category not in self.category_index:
-            self.category_index[category] = []
-        if mem_id not in self.category_index[category]:
-            self.category_index[category].append(mem_id)
-        
+        if self.write_behind:
+            # Snapshot the serialized content; callers may keep mutating their dict
+            record = (mem_id, category, content_str, list(tags), timestamp, source,
+                      enhanced_relevance_score)
+            with self._pending_lock:
+                self._pending.pop(mem_id, None)
+                self._pending[mem_id] = record
+                queued = len(self._pending)
+                if queued >= self.max_pending:
+                    self.write_behind_stats["inline_flushes"] += 1
+            if queued >= self.max_pending:
+                # Backpressure: the flusher is behind, so this caller pays for the commit
+                self.flush()
+            elif queued >= self.flush_batch_size:
+                self._flush_requested.set()
+        else:
+            with self._connection() as conn:
+                seq = self._write_memories(conn.cursor(), [
+                    (mem_id, category, content, tags, timestamp, source, enhanced_relevance_score)
+                ])
+            self._publish(seq)
+        
+        # Update cached indexes (the persisted postings are written with the row)
+        self.category_index.add(category, mem_id)
         for tag in tags:
-            if tag not in self.tag_index:
-                self.tag_index[tag] = []
-            if mem_id not in self.tag_index[tag]:
-                self.tag_index[tag].append(mem_id)
-        
-        if source not in self.source_index:
-            self.source_index[source] = []
-        if mem_id not in self.source_index[source]:
-            self.source_index[source].append(mem_id)
+            self.tag_index.add(tag, mem_id)
+        self.source_index.add(source, mem_id)
         
         # Learning: Store connections and patterns
         if connections:
@@ -241,18 +1162,190 @@ class HeadyMemory:
         
         return mem_id
     
+    def bulk_store(self, records: Iterable[Dict[str, Any]], chunk_size: int = 5000) -> int:
+        """
+        Store many memories in chunked transactions, streaming the input.
+        Each record is a dict with category and content, and optionally tags,
+        source, relevance_score and timestamp (the shape export_stream yields).
+        IDs are derived exactly as in store(); relevance scores are taken as
+        given and access statistics start from zero. Returns records stored.
+        """
+        self.flush()
+        chunk_size = max(chunk_size, 1)
+        imported_at = datetime.now().isoformat()
+        total = 0
+        chunk: Dict[str, Tuple] = {}
+        
+        def write(chunk):
+            with self._connection() as conn:
+                seq = self._write_memories(conn.cursor(), list(chunk.values()))
+            self._publish(seq)
+            return len(chunk)
+        
+        for record in records:
+            category = record["category"]
+            content_str = json.dumps(record["content"], sort_keys=True)
+            mem_id = hashlib.sha256(f"{category}:{content_str}".encode()).hexdigest()[:16]
+            # Keyed by ID so a repeated record in one chunk is written once
+            chunk.pop(mem_id, None)
+            chunk[mem_id] = (mem_id, category, content_str, list(record.get("tags") or []),
+                             record.get("timestamp") or imported_at,
+                             record.get("source", "system"), record.get("relevance_score", 1.0))
+            if len(chunk) >= chunk_size:
+                total += write(chunk)
+                chunk = {}
+        if chunk:
+            total += write(chunk)
+        
+        # Postings were written in bulk; cached lists reload on next use
+        for index in (self.category_index, self.tag_index, self.source_index):
+            index.invalidate()
+        self.learning_metrics["total_stored"] += total
+        return total
+    
+    def import_jsonl(self, source: Union[str, Path, IO[str]], chunk_size: int = 5000) -> int:
+        """bulk_store records from a JSONL file or text stream, one line at a time."""
+        if isinstance(source, (str, Path)):
+            with open(source, "r", encoding="utf-8") as f:
+                return self.import_jsonl(f, chunk_size)
+        return self.bulk_store((json.loads(line) for line in source if line.strip()), chunk_size)
+    
+    def _write_memories(self, cursor: sqlite3.Cursor, records: List[Tuple]) -> int:
+        """
+        Upsert (mem_id, category, content, tags, timestamp, source, relevance_score)
+        records and keep the full-text index in sync, inside the caller's transaction.
+        content may be a dict or its JSON serialization. Re-storing an existing ID
+        resets its access statistics. Returns the last change-feed seq written;
+        callers _publish it once the transaction commits.
+        """
+        needs_text = self.fts_enabled or self.embedder is not None
+        rows = []
+        fts_rows = []
+        vector_items = []
+        postings = []
+        large = []
+        for mem_id, category, content, tags, timestamp, source, relevance_score in records:
+            if isinstance(content, str):
+                content_json, content = content, (json.loads(content) if needs_text else None)
+            else:
+                content_json = json.dumps(content)
+            rowid = memory_rowid(mem_id)
+            text = searchable_text(content)
+            if len(content_json) >= self.COMPRESS_THRESHOLD:
+                large.append((len(rows), content_json))
+                content_json = ""
+            rows.append([rowid, mem_id, category, content_json, json.dumps(tags),
+                         timestamp, source, relevance_score, None])
+            fts_rows.append((rowid, text, " ".join(tags)))
+            vector_items.append((rowid, text, tags))
+            postings.extend(self._postings_for(rowid, category, tags, source))
+        
+        if large:
+            digests = self._write_payloads(cursor, [content_json for _, content_json in large])
+            for (position, _), digest in zip(large, digests):
+                rows[position][-1] = digest
+        
+        # Hash-derived rowids are random; writing in key order keeps b-tree
+        # inserts local for large batches
+        if len(rows) > 1:
+            rows.sort(key=lambda row: row[0])
+            fts_rows.sort(key=lambda row: row[0])
+            postings.sort()
+        
+        cursor.executemany("""
+            INSERT INTO memories 
+            (rowid, id, category, content, tags, timestamp, source, relevance_score,
+             payload_digest, access_count, last_accessed)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, NULL)
+            ON CONFLICT(id) DO UPDATE SET
+                category = excluded.category,
+                content = excluded.content,
+                payload_digest = excluded.payload_digest,
+                tags = excluded.tags,
+                timestamp = excluded.timestamp,
+                source = excluded.source,
+                relevance_score = excluded.relevance_score,
+                access_count = 0,
+                last_accessed = NULL
+        """, rows)
+        
+        if self.fts_enabled:
+            cursor.executemany("DELETE FROM memories_fts WHERE rowid = ?", [(row[0],) for row in rows])
+            cursor.executemany("INSERT INTO memories_fts (rowid, content, tags) VALUES (?, ?, ?)", fts_rows)
+        
+        cursor.executemany(
+            "INSERT OR IGNORE INTO memory_index (kind, key, mem_rowid) VALUES (?, ?, ?)", postings
+        )
+        
+        if self.embedder:
+            self._write_vectors(cursor, vector_items)
+        
+        cursor.executemany(
+            "INSERT INTO memory_changes (mem_id, category, op, timestamp) VALUES (?, ?, 'store', ?)",
+            [(row[1], row[2], row[5]) for row in rows]
+        )
+        cursor.execute("SELECT last_insert_rowid()")
+        return cursor.fetchone()[0]
+    
+    def _write_payloads(self, cursor: sqlite3.Cursor, contents: List[str]) -> List[str]:
+        """
+        Store serialized contents as compressed payloads keyed by content hash.
+        Payloads already present are neither recompressed nor duplicated.
+        Returns the digest of each content.
+        """
+        # Check and insert under the write lock, in the transaction that writes the
+        # referencing rows, so compaction cannot drop a payload found to exist
+        if not cursor.connection.in_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
+        
+        encoded = [content.encode() for content in contents]
+        digests = [hashlib.sha256(data).hexdigest() for data in encoded]
+        
+        unique = dict(zip(digests, encoded))
+        existing = set()
+        keys = list(unique)
+        for start in range(0, len(keys), self.SQL_BATCH_SIZE):
+            chunk = keys[start:start + self.SQL_BATCH_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f"SELECT digest FROM memory_payloads WHERE digest IN ({placeholders})", chunk)
+            existing.update(digest for (digest,) in cursor.fetchall())
+        
+        cursor.executemany(
+            "INSERT OR IGNORE INTO memory_payloads (digest, codec, data, size) VALUES (?, ?, ?, ?)",
+            [(digest, *compress_payload(data), len(data))
+             for digest, data in unique.items() if digest not in existing]
+        )
+        return digests
+    
+    def _write_vectors(self, cursor: sqlite3.Cursor, items: List[Tuple[int, str, List[str]]]) -> List[array]:
+        """Embed (rowid, text, tags) items in one batch and persist the vectors."""
+        texts = [f"{' '.join(tags)} {text}"[:self.EMBED_TEXT_LIMIT] for _, text, tags in items]
+        vectors = [array("f", v) for v in self.embedder.embed(texts)]
+        cursor.executemany(
+            "INSERT OR REPLACE INTO memory_vectors (mem_rowid, dim, vector) VALUES (?, ?, ?)",
+            [(rowid, len(vector), vector.tobytes()) for (rowid, _, _), vector in zip(items, vectors)]
+        )
+        if self._vectors is not None:
+            for (rowid, _, _), vector in zip(items, vectors):
+                self._vectors.upsert(rowid, vector)
+        return vectors
+    
+    @staticmethod
+    def _postings_for(rowid: int, category: str, tags: List[str], source: str) -> List[Tuple[str, str, int]]:
+        """memory_index rows for one memory."""
+        return ([("category", category, rowid), ("source", source, rowid)] +
+                [("tag", tag, rowid) for tag in tags])
+    
     def _identify_knowledge_connections(self, category: str, tags: List[str], content: Dict[str, Any]) -> List[str]:
         """Identify connections to existing memories for learning."""
         connections = []
         
         # Find related memories by category
-        if category in self.category_index:
-            connections.extend(self.category_index[category][:3])  # Top 3 connections
+        connections.extend(self.category_index.head(category, 3))  # Top 3 connections
         
         # Find related memories by tags
         for tag in tags:
-            if tag in self.tag_index:
-                connections.extend(self.tag_index[tag][:2])  # Top 2 per tag
+            connections.extend(self.tag_index.head(tag, 2))  # Top 2 per tag
         
         return list(set(connections))  # Remove duplicates
     
@@ -261,14 +1354,12 @@ class HeadyMemory:
         enhanced_score = base_score
         
         # Boost based on category popularity
-        if category in self.category_index:
-            category_popularity = len(self.category_index[category])
-            if category_popularity > 5:  # Popular category
-                enhanced_score += 0.1
+        if self.category_index.has_at_least(category, 6):  # Popular category
+            enhanced_score += 0.1
         
         # Boost based on tag importance
         for tag in tags:
-            if tag in self.tag_index and len(self.tag_index[tag]) > 3:
+            if self.tag_index.has_at_least(tag, 4):
                 enhanced_score += 0.05
         
         return min(enhanced_score, 2.0)  # Cap at 2.0
@@ -299,151 +1390,526 @@ class HeadyMemory:
     
     def recall(self, mem_id: str) -> Optional[MemoryEntry]:
         """Recall specific memory by ID."""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM memories WHERE id = ?", (mem_id,))
-        row = cursor.fetchone()
-        
-        if row:
-            # Update access count
-            cursor.execute("""
+        return self.recall_many([mem_id]).get(mem_id)
+    
+    def recall_many(self, mem_ids: List[str]) -> Dict[str, MemoryEntry]:
+        """
+        Recall a batch of memories over a single connection.
+        Rows are fetched with chunked WHERE rowid IN (...) statements and the
+        access-count bump is applied as one batched UPDATE in one commit.
+        """
+        mem_ids = list(dict.fromkeys(mem_ids))
+        if not mem_ids:
+            return {}
+        
+        self._flush_for_read()
+        with self._connection() as conn:
+            return self._load_entries(conn.cursor(), mem_ids)
+    
+    def _load_entries(self, cursor: sqlite3.Cursor, mem_ids: List[str]) -> Dict[str, MemoryEntry]:
+        """Fetch entries by ID and bump their access counts on the given cursor."""
+        # Integer rowid lookups go straight to the table b-tree
+        rowids = []
+        for mem_id in mem_ids:
+            try:
+                rowids.append(memory_rowid(mem_id))
+            except ValueError:
+                continue  # not a memory ID
+        rows = []
+        for start in range(0, len(rowids), self.SQL_BATCH_SIZE):
+            chunk = rowids[start:start + self.SQL_BATCH_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f"""
+                SELECT {self.ENTRY_COLUMNS}
+                FROM memories m {self.PAYLOAD_JOIN}
+                WHERE m.rowid IN ({placeholders})
+            """, chunk)
+            rows.extend(cursor.fetchall())
+        
+        return {entry.id: entry for entry in self._entries_from_rows(cursor, rows)}
+    
+    def _entries_from_rows(self, cursor: sqlite3.Cursor, rows: List[Tuple],
+                           track_access: bool = True) -> List[MemoryEntry]:
+        """Build entries from ENTRY_COLUMNS rows, bumping their access counts."""
+        accessed_at = datetime.now().isoformat() if track_access else None
+        if rows and track_access:
+            # Update access counts
+            cursor.executemany("""
                 UPDATE memories 
                 SET access_count = access_count + 1, last_accessed = ?
-                WHERE id = ?
-            """, (datetime.now().isoformat(), mem_id))
-            conn.commit()
-            
-            entry = MemoryEntry(
+                WHERE rowid = ?
+            """, [(accessed_at, memory_rowid(row[0])) for row in rows])
+        
+        entries = []
+        for row in rows:
+            # Content is decoded (and decompressed) only if the caller reads it
+            entries.append(LazyMemoryEntry(
+                row[2], row[3],
                 id=row[0],
                 category=row[1],
-                content=json.loads(row[2]),
-                tags=json.loads(row[3]),
-                timestamp=row[4],
-                source=row[5],
-                relevance_score=row[6],
-                access_count=row[7] + 1,
-                last_accessed=datetime.now().isoformat()
-            )
-            conn.close()
-            return entry
-        
-        conn.close()
-        return None
+                tags=json.loads(row[4]),
+                timestamp=row[5],
+                source=row[6],
+                relevance_score=row[7],
+                access_count=row[8] + 1 if track_access else row[8],
+                last_accessed=accessed_at or row[9]
+            ))
+        
+        return entries
     
-    def query(self, category: Optional[str] = None, tags: Optional[List[str]] = None,
-              source: Optional[str] = None, limit: int = 100) -> List[MemoryEntry]:
-        """Query memories using indexes for fast retrieval."""
-        candidate_ids = set()
+    def search(self, keywords, max_results: int = 10,
+               category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Full-text search over memory content and tags.
+        Returns up to max_results entries as dicts, best BM25 match first.
+        """
+        return self.search_many([keywords], max_results, category)[0]
+    
+    def search_many(self, keyword_sets: List[Any], max_results: int = 10,
+                    category: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Batched full-text search: one ranked result list per keyword set, run on
+        one connection with a single entry load for all hits.
+        """
+        term_sets = []
+        for keywords in keyword_sets:
+            if isinstance(keywords, str):
+                keywords = keywords.split()
+            term_sets.append([k.strip() for k in keywords if k and k.strip()])
+        if max_results <= 0 or not any(term_sets):
+            return [[] for _ in term_sets]
+        
+        if not self.fts_enabled:
+            return [self._search_tags(terms, max_results, category) if terms else []
+                    for terms in term_sets]
+        
+        sql = """
+            SELECT memories_fts.rowid, bm25(memories_fts, 1.0, 2.0) AS rank
+            FROM memories_fts
+        """
+        if category:
+            sql += """
+                JOIN memories ON memories.rowid = memories_fts.rowid
+                WHERE memories_fts MATCH ? AND memories.category = ?
+            """
+        else:
+            sql += " WHERE memories_fts MATCH ?"
+        sql += " ORDER BY rank LIMIT ?"
         
-        # Use indexes for fast filtering
-        if category and category in self.category_index:
-            candidate_ids = set(self.category_index[category])
+        self._flush_for_search(term_sets)
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            ranked_sets = []
+            for terms in term_sets:
+                if not terms:
+                    ranked_sets.append([])
+                    continue
+                # Quote each term so user input never becomes FTS5 query syntax
+                match = " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+                params = [match, category, max_results] if category else [match, max_results]
+                cursor.execute(sql, params)
+                ranked_sets.append([(memory_id(rowid), rank) for rowid, rank in cursor.fetchall()])
+            entries = self._load_entries(
+                cursor, list({mem_id for ranked in ranked_sets for mem_id, _ in ranked}))
         
-        if tags:
-            tag_ids = set()
-            for tag in tags:
-                if tag in self.tag_index:
-                    tag_ids.update(self.tag_index[tag])
-            if candidate_ids:
-                candidate_ids &= tag_ids
-            else:
-                candidate_ids = tag_ids
+        results = []
+        for ranked in ranked_sets:
+            matches = []
+            for mem_id, rank in ranked:
+                if mem_id in entries:
+                    result = asdict(entries[mem_id])
+                    result["search_score"] = -rank  # bm25() is lower-is-better
+                    matches.append(result)
+            results.append(matches)
         
-        if source and source in self.source_index:
-            source_ids = set(self.source_index[source])
-            if candidate_ids:
-                candidate_ids &= source_ids
-            else:
-                candidate_ids = source_ids
+        return results
+    
+    def _search_tags(self, terms: List[str], max_results: int,
+                     category: Optional[str]) -> List[Dict[str, Any]]:
+        """Tag-index fallback for search when FTS5 is unavailable."""
+        hits: Dict[str, int] = {}
+        for term in terms:
+            for mem_id in self.tag_index.get(term.lower(), []):
+                hits[mem_id] = hits.get(mem_id, 0) + 1
+        
+        entries = self.recall_many(list(hits)).values()
+        if category:
+            entries = [e for e in entries if e.category == category]
+        ranked = sorted(entries, key=lambda e: (hits[e.id], e.relevance_score), reverse=True)
         
-        # If no filters, get all
-        if not candidate_ids and not (category or tags or source):
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM memories LIMIT ?", (limit,))
-            candidate_ids = {row[0] for row in cursor.fetchall()}
-            conn.close()
+        return [{**asdict(e), "search_score": float(hits[e.id])} for e in ranked[:max_results]]
+    
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.embedder is not None
+    
+    def _vector_store(self) -> VectorStore:
+        """Load persisted embeddings into the matrix once, embedding any rows that lack one."""
+        if self._vectors is not None:
+            return self._vectors
+        
+        with self._vectors_lock:
+            if self._vectors is not None:
+                return self._vectors
+            
+            self._flush_for_read()
+            store = VectorStore(self.embedder.dim)
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT mem_rowid, vector FROM memory_vectors WHERE dim = ?",
+                               (self.embedder.dim,))
+                for rowid, blob in cursor.fetchall():
+                    store.upsert(rowid, array("f", blob))
+                
+                # Backfill memories stored before the semantic tier was enabled
+                cursor.execute(f"""
+                    SELECT m.rowid, {self.CONTENT_COLUMNS}, m.tags FROM memories m
+                    {self.PAYLOAD_JOIN}
+                    LEFT JOIN memory_vectors v ON v.mem_rowid = m.rowid AND v.dim = ?
+                    WHERE v.mem_rowid IS NULL
+                """, (self.embedder.dim,))
+                missing = [(rowid, searchable_text(decode_content(codec, data)), json.loads(tags))
+                           for rowid, codec, data, tags in cursor.fetchall()]
+                for start in range(0, len(missing), self.SQL_BATCH_SIZE):
+                    chunk = missing[start:start + self.SQL_BATCH_SIZE]
+                    for (rowid, _, _), vector in zip(chunk, self._write_vectors(cursor, chunk)):
+                        store.upsert(rowid, vector)
+            
+            self._vectors = store
+            return store
+    
+    def semantic_search(self, text: str, max_results: int = 10,
+                        category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Recall memories by embedding similarity (cosine), best match first."""
+        return self.semantic_search_many([text], max_results, category)[0]
+    
+    def semantic_search_many(self, texts: List[str], max_results: int = 10,
+                             category: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+        """Batched semantic recall: one cosine top-k ranking per query text."""
+        if not self.semantic_enabled or not texts:
+            return [[] for _ in texts]
         
-        # Fetch full entries
-        results = []
-        for mem_id in list(candidate_ids)[:limit]:
-            entry = self.recall(mem_id)
-            if entry:
-                results.append(entry)
+        queries = [array("f", v) for v in self.embedder.embed(list(texts))]
+        # Over-fetch when filtering by category so top-k survives the filter
+        fetch = max_results * 4 if category else max_results
+        ranked = self._vector_store().top_k(queries, fetch)
+        
+        entries = self.recall_many([memory_id(rowid) for hits in ranked for rowid, _ in hits])
         
-        # Sort by relevance and recency
-        results.sort(key=lambda x: (x.relevance_score, x.timestamp), reverse=True)
+        results = []
+        for hits in ranked:
+            matches = []
+            for rowid, similarity in hits:
+                entry = entries.get(memory_id(rowid))
+                if entry is None or (category and entry.category != category):
+                    continue
+                matches.append({**asdict(entry), "similarity": similarity})
+                if len(matches) == max_results:
+                    break
+            results.append(matches)
         
         return results
     
+    def query(self, category: Optional[str] = None, tags: Optional[List[str]] = None,
+              source: Optional[str] = None, limit: int = 100) -> List[MemoryEntry]:
+        """
+        Query memories using indexes for fast retrieval.
+        Filters combine with AND; a memory matches tags if it carries any of them.
+        Returns the top entries by relevance, then recency.
+        """
+        return self.query_page(category, tags, source, limit)[0]
+    
+    def query_page(self, category: Optional[str] = None, tags: Optional[List[str]] = None,
+                   source: Optional[str] = None, limit: int = 100,
+                   cursor: Optional[str] = None) -> Tuple[List[MemoryEntry], Optional[str]]:
+        """
+        One page of query results plus an opaque cursor for the next page
+        (None when the listing is exhausted). Paging is keyset-based, so deep
+        pages cost the same as the first.
+        """
+        if limit <= 0:
+            return [], None
+        entries = self._query_entries(category, tags, source, limit + 1, cursor)
+        if len(entries) <= limit:
+            return entries, None
+        entries = entries[:limit]
+        return entries, self._encode_cursor(entries[-1])
+    
+    def latest(self, category: Optional[str] = None, tags: Optional[List[str]] = None,
+               source: Optional[str] = None) -> Optional[MemoryEntry]:
+        """Most recently stored matching memory (by timestamp, whatever its relevance)."""
+        self._flush_for_read()
+        plan = self._plan_query(category, tags, source)
+        if plan is None:
+            return None
+        where, params = plan
+        sql = f"SELECT {self.ENTRY_COLUMNS} FROM memories m {self.PAYLOAD_JOIN}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY m.timestamp DESC, m.rowid DESC LIMIT 1"
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            entries = self._entries_from_rows(cursor, cursor.fetchall(), track_access=False)
+        return entries[0] if entries else None
+    
+    def iter_query(self, category: Optional[str] = None, tags: Optional[List[str]] = None,
+                   source: Optional[str] = None, page_size: int = 500) -> Iterator[MemoryEntry]:
+        """Stream every matching memory in query order, one page in memory at a time."""
+        cursor = None
+        while True:
+            entries, cursor = self.query_page(category, tags, source, page_size, cursor)
+            yield from entries
+            if cursor is None:
+                return
+    
+    def export_stream(self, category: Optional[str] = None, tags: Optional[List[str]] = None,
+                      source: Optional[str] = None, page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Stream matching memories as dicts (bulk_store input shape), one keyset
+        page in memory at a time. Exporting does not count as an access.
+        """
+        after = None
+        while True:
+            entries = self._query_entries(category, tags, source, page_size, after, track_access=False)
+            for entry in entries:
+                yield asdict(entry)
+            if len(entries) < page_size:
+                return
+            after = self._encode_cursor(entries[-1])
+    
+    def export_jsonl(self, target: Union[str, Path, IO[str]], category: Optional[str] = None,
+                     tags: Optional[List[str]] = None, source: Optional[str] = None) -> int:
+        """Write export_stream to a JSONL file or text stream. Returns records written."""
+        if isinstance(target, (str, Path)):
+            with open(target, "w", encoding="utf-8") as f:
+                return self.export_jsonl(f, category, tags, source)
+        count = 0
+        for record in self.export_stream(category, tags, source):
+            target.write(json.dumps(record) + "\n")
+            count += 1
+        return count
+    
+    def _query_entries(self, category: Optional[str], tags: Optional[List[str]],
+                       source: Optional[str], limit: int, after: Optional[str] = None,
+                       track_access: bool = True) -> List[MemoryEntry]:
+        """Run a planned query: filters, ordering, keyset and LIMIT all in SQL."""
+        self._flush_for_read()
+        plan = self._plan_query(category, tags, source)
+        if plan is None:
+            return []
+        where, params = plan
+        
+        if after:
+            where.append("(m.relevance_score, m.timestamp, m.rowid) < (?, ?, ?)")
+            params.extend(self._decode_cursor(after))
+        
+        sql = f"SELECT {self.ENTRY_COLUMNS} FROM memories m {self.PAYLOAD_JOIN}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {self.QUERY_ORDER} LIMIT ?"
+        params.append(limit)
+        
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return self._entries_from_rows(cursor, cursor.fetchall(), track_access)
+    
+    def _plan_query(self, category: Optional[str], tags: Optional[List[str]],
+                    source: Optional[str]) -> Optional[Tuple[List[str], List[Any]]]:
+        """
+        WHERE clauses for the filters, or None if nothing can match.
+        Postings already cached in memory are intersected here and passed as a
+        rowid list when small; otherwise the filters run against the indexed
+        category/source columns and the persisted tag postings.
+        """
+        filters = [(index, [key]) for index, key in
+                   ((self.category_index, category), (self.source_index, source)) if key]
+        if tags:
+            filters.append((self.tag_index, list(tags)))
+        
+        if filters and all(index.cached(key) is not None for index, keys in filters for key in keys):
+            candidates = None
+            for index, keys in filters:
+                rowids = union_postings([index.cached(key) for key in keys])
+                candidates = rowids if candidates is None else intersect_postings(candidates, rowids)
+            if not candidates:
+                return None
+            if len(candidates) <= self.SQL_BATCH_SIZE:
+                return [f"m.rowid IN ({','.join('?' * len(candidates))})"], list(candidates)
+        
+        where: List[str] = []
+        params: List[Any] = []
+        if category:
+            where.append("m.category = ?")
+            params.append(category)
+        if source:
+            where.append("m.source = ?")
+            params.append(source)
+        if tags:
+            where.append("m.rowid IN (SELECT mem_rowid FROM memory_index "
+                         f"WHERE kind = 'tag' AND key IN ({','.join('?' * len(tags))}))")
+            params.extend(tags)
+        return where, params
+    
+    @staticmethod
+    def _encode_cursor(entry: MemoryEntry) -> str:
+        key = [entry.relevance_score, entry.timestamp, entry.id]
+        return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> List[Any]:
+        try:
+            relevance_score, timestamp, mem_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return [relevance_score, timestamp, memory_rowid(mem_id)]
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid query cursor: {cursor!r}") from e
+    
+    def latest_seq(self) -> int:
+        """Sequence number of the most recent committed memory change."""
+        return self._latest_seq
+    
+    def _read_latest_seq(self) -> int:
+        with self._connection() as conn:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM memory_changes").fetchone()[0]
+    
+    def _publish(self, seq: Optional[int]):
+        """Wake subscribers once changes up to seq are committed."""
+        if seq is None:
+            return
+        with self._changes:
+            if seq > self._latest_seq:
+                self._latest_seq = seq
+                self._changes.notify_all()
+    
+    def changes_since(self, since_seq: int, categories: Optional[List[str]] = None,
+                      limit: int = 500) -> List[Dict[str, Any]]:
+        """Committed changes after since_seq, oldest first."""
+        sql = "SELECT seq, mem_id, category, op, timestamp FROM memory_changes WHERE seq > ?"
+        params: List[Any] = [since_seq]
+        if categories:
+            sql += f" AND category IN ({','.join('?' * len(categories))})"
+            params.extend(categories)
+        sql += " ORDER BY seq LIMIT ?"
+        params.append(limit)
+        
+        with self._connection() as conn:
+            return [{"seq": seq, "id": mem_id, "category": category, "op": op, "timestamp": timestamp}
+                    for seq, mem_id, category, op, timestamp in conn.execute(sql, params)]
+    
+    def _wait_for_changes(self, since_seq: int, timeout: Optional[float]) -> bool:
+        """Block until a change after since_seq is published; False on timeout or close."""
+        with self._changes:
+            return self._changes.wait_for(
+                lambda: self._closed or self._latest_seq > since_seq, timeout
+            ) and not self._closed
+    
+    def subscribe(self, since_seq: Optional[int] = None, categories: Optional[List[str]] = None,
+                  timeout: Optional[float] = None, poll_interval: float = 1.0) -> Iterator[Dict[str, Any]]:
+        """
+        Tail memory writes: yields change dicts (seq, id, category, op, timestamp)
+        committed after since_seq (default: only changes from now on).
+        Write-behind stores appear once their batch is flushed.
+        Ends after timeout seconds without a change, or when the memory is closed.
+        poll_interval bounds the wait so writes from other processes are seen too.
+        """
+        seq = self._latest_seq if since_seq is None else since_seq
+        idle = 0.0
+        while not self._closed:
+            changes = self.changes_since(seq, categories)
+            if changes:
+                idle = 0.0
+                for change in changes:
+                    seq = change["seq"]
+                    yield change
+                continue
+            
+            wait = poll_interval if timeout is None else min(poll_interval, timeout - idle)
+            if wait <= 0:
+                return
+            if not self._wait_for_changes(seq, wait):
+                idle += wait
+    
+    async def asubscribe(self, since_seq: Optional[int] = None, categories: Optional[List[str]] = None,
+                         timeout: Optional[float] = None,
+                         poll_interval: float = 1.0) -> AsyncIterator[Dict[str, Any]]:
+        """Async iterator over the change feed; waits run off the event loop."""
+        seq = self._latest_seq if since_seq is None else since_seq
+        idle = 0.0
+        while not self._closed:
+            changes = await asyncio.to_thread(self.changes_since, seq, categories)
+            if changes:
+                idle = 0.0
+                for change in changes:
+                    seq = change["seq"]
+                    yield change
+                continue
+            
+            wait = poll_interval if timeout is None else min(poll_interval, timeout - idle)
+            if wait <= 0:
+                return
+            if not await asyncio.to_thread(self._wait_for_changes, seq, wait):
+                idle += wait
+    
     def store_external_source(self, source_type: str, content: Dict[str, Any],
                              source_url: Optional[str] = None,
                              comparative_analysis: Optional[str] = None) -> str:
         """Store external source with comparative analysis."""
         source_id = hashlib.sha256(f"{source_type}:{source_url}".encode()).hexdigest()[:16]
         
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO external_sources
-            (id, source_type, source_url, content, comparative_analysis, integrated_at, relevance_score)
-            VALUES (?, ?, ?, ?, ?, ?, 1.0)
-        """, (source_id, source_type, source_url, json.dumps(content), 
-              comparative_analysis, datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT OR REPLACE INTO external_sources
+                (id, source_type, source_url, content, comparative_analysis, integrated_at, relevance_score)
+                VALUES (?, ?, ?, ?, ?, ?, 1.0)
+            """, (source_id, source_type, source_url, json.dumps(content), 
+                  comparative_analysis, datetime.now().isoformat()))
         
         return source_id
     
     def get_external_sources(self, source_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """Retrieve external sources."""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            
+            if source_type:
+                cursor.execute("SELECT * FROM external_sources WHERE source_type = ?", (source_type,))
+            else:
+                cursor.execute("SELECT * FROM external_sources")
+            
+            sources = []
+            for row in cursor.fetchall():
+                sources.append({
+                    "id": row[0],
+                    "source_type": row[1],
+                    "source_url": row[2],
+                    "content": json.loads(row[3]),
+                    "comparative_analysis": row[4],
+                    "integrated_at": row[5],
+                    "relevance_score": row[6]
+                })
         
-        if source_type:
-            cursor.execute("SELECT * FROM external_sources WHERE source_type = ?", (source_type,))
-        else:
-            cursor.execute("SELECT * FROM external_sources")
-        
-        sources = []
-        for row in cursor.fetchall():
-            sources.append({
-                "id": row[0],
-                "source_type": row[1],
-                "source_url": row[2],
-                "content": json.loads(row[3]),
-                "comparative_analysis": row[4],
-                "integrated_at": row[5],
-                "relevance_score": row[6]
-            })
-        
-        conn.close()
         return sources
     
     def set_preference(self, key: str, value: Any, category: str = "general"):
         """Store user preference."""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO user_preferences (key, value, category, updated_at)
-            VALUES (?, ?, ?, ?)
-        """, (key, json.dumps(value), category, datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT OR REPLACE INTO user_preferences (key, value, category, updated_at)
+                VALUES (?, ?, ?, ?)
+            """, (key, json.dumps(value), category, datetime.now().isoformat()))
     
     def get_preference(self, key: str, default: Any = None) -> Any:
         """Retrieve user preference."""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT value FROM user_preferences WHERE key = ?", (key,))
-        row = cursor.fetchone()
-        conn.close()
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT value FROM user_preferences WHERE key = ?", (key,))
+            row = cursor.fetchone()
         
         if row:
             return json.loads(row[0])
@@ -451,42 +1917,43 @@ class HeadyMemory:
     
     def get_all_preferences(self, category: Optional[str] = None) -> Dict[str, Any]:
         """Get all user preferences."""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        if category:
-            cursor.execute("SELECT key, value FROM user_preferences WHERE category = ?", (category,))
-        else:
-            cursor.execute("SELECT key, value FROM user_preferences")
-        
-        preferences = {}
-        for key, value in cursor.fetchall():
-            preferences[key] = json.loads(value)
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            
+            if category:
+                cursor.execute("SELECT key, value FROM user_preferences WHERE category = ?", (category,))
+            else:
+                cursor.execute("SELECT key, value FROM user_preferences")
+            
+            preferences = {}
+            for key, value in cursor.fetchall():
+                preferences[key] = json.loads(value)
         
-        conn.close()
         return preferences
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get memory statistics."""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM memories")
-        total_memories = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT category, COUNT(*) FROM memories GROUP BY category")
-        by_category = dict(cursor.fetchall())
-        
-        cursor.execute("SELECT COUNT(*) FROM external_sources")
-        external_sources = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM user_preferences")
-        preferences = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT SUM(access_count) FROM memories")
-        total_accesses = cursor.fetchone()[0] or 0
-        
-        conn.close()
+        self._flush_for_read()
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT COUNT(*) FROM memories")
+            total_memories = cursor.fetchone()[0]
+            
+            cursor.execute("SELECT category, COUNT(*) FROM memories GROUP BY category")
+            by_category = dict(cursor.fetchall())
+            
+            cursor.execute("SELECT COUNT(*) FROM external_sources")
+            external_sources = cursor.fetchone()[0]
+            
+            cursor.execute("SELECT COUNT(*) FROM user_preferences")
+            preferences = cursor.fetchone()[0]
+            
+            cursor.execute("SELECT SUM(access_count) FROM memories")
+            total_accesses = cursor.fetchone()[0] or 0
+            
+            cursor.execute("SELECT COUNT(*), SUM(size), SUM(length(data)) FROM memory_payloads")
+            payload_count, payload_bytes, stored_bytes = cursor.fetchone()
         
         return {
             "total_memories": total_memories,
@@ -496,7 +1963,16 @@ class HeadyMemory:
             "total_accesses": total_accesses,
             "categories_indexed": len(self.category_index),
             "tags_indexed": len(self.tag_index),
-            "sources_indexed": len(self.source_index)
+            "sources_indexed": len(self.source_index),
+            "full_text_search": self.fts_enabled,
+            "payloads": {"count": payload_count, "bytes": payload_bytes or 0,
+                         "stored_bytes": stored_bytes or 0,
+                         "codec": "zstd" if ZSTD_AVAILABLE else "zlib"},
+            "semantic_vectors": len(self._vectors) if self._vectors is not None else None,
+            "write_behind": {**self.write_behind_stats, "enabled": self.write_behind,
+                             "pending": len(self._pending)},
+            "compaction": {**self.compaction_stats, "background": self._compactor_active},
+            "latest_seq": self._latest_seq
         }
 
 
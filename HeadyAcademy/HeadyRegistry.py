@@ -111,6 +111,10 @@ class HeadyRegistry:
         self.services: Dict[str, Service] = {}
         self.tools: Dict[str, Tool] = {}
         
+        # Bumped whenever capabilities are (re)discovered or loaded; indexes
+        # built from the registry compare it to know when to refresh
+        self.version = 0
+        
         self._ensure_registry_dir()
         self._load_or_discover()
     
@@ -159,6 +163,7 @@ class HeadyRegistry:
                 )
                 self.nodes[node.name] = node
         
+        self.touch()
         print(f"  * Discovered {len(self.nodes)} nodes")
     
     def discover_workflows(self):
@@ -200,6 +205,7 @@ class HeadyRegistry:
             except Exception as e:
                 print(f"  [WARN] Error parsing workflow {workflow_file.name}: {e}")
         
+        self.touch()
         print(f"  * Discovered {len(self.workflows)} workflows")
     
     def discover_skills(self):
@@ -212,6 +218,7 @@ class HeadyRegistry:
             skill = Skill(**skill_data)
             self.skills[skill.name] = skill
         
+        self.touch()
         print(f"  * Discovered {len(self.skills)} skills")
     
     def discover_services(self):
@@ -229,6 +236,7 @@ class HeadyRegistry:
             service = Service(**service_data)
             self.services[service.name] = service
         
+        self.touch()
         print(f"  * Discovered {len(self.services)} services")
     
     def discover_tools(self):
@@ -253,6 +261,7 @@ class HeadyRegistry:
             )
             self.tools[tool.name] = tool
         
+        self.touch()
         print(f"  * Discovered {len(self.tools)} tools")
     
     def save(self):
@@ -291,8 +300,13 @@ class HeadyRegistry:
         self.services = {k: self._safe_init(Service, v) for k, v in data.get('services', {}).items()}
         self.tools = {k: self._safe_init(Tool, v) for k, v in data.get('tools', {}).items()}
         
+        self.touch()
         print(f"HeadyRegistry: Loaded {self.get_total_count()} capabilities from {self.registry_file}")
     
+    def touch(self):
+        """Mark capabilities as changed (call after editing the dicts directly)."""
+        self.version += 1
+    
     def get_total_count(self) -> int:
         """Get total count of all capabilities."""
         return len(self.nodes) + len(self.workflows) + len(self.skills) + len(self.services) + len(self.tools)
@@ -0,0 +1,705 @@
+#!/usr/bin/env python3
+# HEADY_BRAND:BEGIN
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  █╗  █╗███████╗ █████╗ ██████╗ █╗   █╗                     ║
+# ║  █║  █║█╔════╝█╔══█╗█╔══█╗╚█╗ █╔╝                     ║
+# ║  ███████║█████╗  ███████║█║  █║ ╚████╔╝                      ║
+# ║  █╔══█║█╔══╝  █╔══█║█║  █║  ╚█╔╝                       ║
+# ║  █║  █║███████╗█║  █║██████╔╝   █║                        ║
+# ║  ╚═╝  ╚═╝╚══════╝╚═╝  ╚═╝╚═════╝    ╚═╝                        ║
+# ║                                                                  ║
+# ║  ∞ SACRED GEOMETRY ∞  Organic Systems · Breathing Interfaces    ║
+# ║  ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━  ║
+# ║  FILE: test_brain.py                                              ║
+# ║  LAYER: root                                                      ║
+# ╚══════════════════════════════════════════════════════════════════╝
+# HEADY_BRAND:END
+
+"""
+Test script for HeadyBrain
+"""
+
+import asyncio
+import io
+import logging.handlers
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "HeadyAcademy"))
+
+from HeadyMemory import HeadyMemory
+from HeadyBrain import (HeadyBrain, BoundedExecutor, CacheSerializer, ContextCache, PhraseMatcher,
+                        RoutingTable, SingleFlight, Stage, StageGraph, setup_logging)
+from HeadyBrain_optimized import HeadyBrainOptimized
+
+
+# Brain caches and memories live under a throwaway root, never in the repo
+SCRATCH = tempfile.TemporaryDirectory()
+
+
+def scratch_dir():
+    """A fresh directory under the test run's temporary root."""
+    return tempfile.mkdtemp(dir=SCRATCH.name)
+
+
+def make_context(brain, request):
+    """Build a context without touching any other Heady system."""
+    return brain._create_context(
+        request, "2026-01-01T00:00:00", {}, [], {}, [], {}, [],
+        {"confidence": 0.5}, ["deployment"], [], None
+    )
+
+
+def test_context_cache():
+    """Test the two-tier LRU + sharded disk context cache."""
+    print("\n" + "="*80)
+    print("TESTING BRAIN CONTEXT CACHE")
+    print("="*80 + "\n")
+
+    brain = HeadyBrain(cache_dir=scratch_dir())
+    with tempfile.TemporaryDirectory() as root:
+        cache = ContextCache(Path(root), max_entries=2, disk_max_bytes=10**9)
+        keys = [brain._get_cache_key(f"request {i}", {}) for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, make_context(brain, f"request {i}"))
+
+        assert (Path(root) / keys[0][:2] / f"{keys[0]}.hbc").exists()
+        stats = cache.get_stats()
+        assert stats["memory_entries"] == 2 and stats["memory_evictions"] == 1
+        print("✓ LRU bounded by entry count, files sharded on disk")
+
+        assert cache.get(keys[2], 60).request == "request 2"
+        assert cache.get(keys[0], 60).request == "request 0"
+        assert cache.get(keys[0], 60) is not None
+        assert cache.get(keys[1], 0) is None
+        stats = cache.get_stats()
+        assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (2, 1, 1)
+        print("✓ Hot entries served from RAM, cold ones promoted from disk")
+
+        small = ContextCache(Path(root) / "small", disk_max_bytes=1)
+        for i in range(5):
+            small.put(brain._get_cache_key(f"r{i}", {}), make_context(brain, f"r{i}"))
+        assert small.get_stats()["disk_evictions"] == 5
+        assert not list((Path(root) / "small").glob("*/*.hbc"))
+        print("✓ Disk tier evicted once over its size cap")
+
+    key = brain._get_cache_key("cached request", brain.default_config)
+    brain._save_to_cache(key, make_context(brain, "cached request"))
+    context = brain.process_request("cached request", {})
+    assert context.cache_hit and not brain.context_cache._memory[key][1].cache_hit
+    print("✓ process_request returns a copy of the cached context")
+
+    return True
+
+
+def test_single_flight():
+    """Test coalescing of concurrent identical requests."""
+    print("\n" + "="*80)
+    print("TESTING BRAIN SINGLE-FLIGHT COALESCING")
+    print("="*80 + "\n")
+
+    brain = HeadyBrain(cache_dir=scratch_dir())
+    runs = []
+    release = threading.Event()
+
+    def slow_pipeline(request, config, timestamp):
+        runs.append(request)
+        release.wait(5)
+        return make_context(brain, request)
+
+    brain._process_request_parallel = slow_pipeline
+    config = {"enable_caching": False}
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        futures = [executor.submit(brain.process_request, "burst request", config) for _ in range(5)]
+        futures.append(executor.submit(brain.process_request, "other request", config))
+        while brain._inflight.in_flight() < 2:
+            time.sleep(0.01)
+        time.sleep(0.2)
+        release.set()
+        contexts = [f.result() for f in futures]
+
+    assert sorted(runs) == ["burst request", "other request"]
+    assert brain.metrics["coalesced_requests"] == 4
+    assert len({id(c) for c in contexts}) == 6
+    print("✓ 5 identical concurrent requests ran the pipeline once")
+
+    flight = SingleFlight()
+    try:
+        flight.do("key", lambda: 1 / 0)
+        assert False, "exception swallowed"
+    except ZeroDivisionError:
+        pass
+    assert flight.do("key", lambda: 42) == (42, False) and flight.in_flight() == 0
+    print("✓ Failures propagate and do not stick")
+
+    return True
+
+
+def test_shared_executor():
+    """Test the long-lived bounded executor behind the parallel pipeline."""
+    print("\n" + "="*80)
+    print("TESTING BRAIN SHARED EXECUTOR")
+    print("="*80 + "\n")
+
+    executor = BoundedExecutor(max_workers=2, queue_size=1)
+    release = threading.Event()
+    blocked = [executor.submit(release.wait, 5) for _ in range(3)]
+    caller = threading.get_ident()
+    rejected = executor.submit(threading.get_ident)
+    assert rejected.result() == caller
+    release.set()
+    assert all(f.result() for f in blocked)
+    assert executor.submit(lambda: 1 / 0).exception() is not None
+    time.sleep(0.05)
+    stats = executor.get_stats()
+    assert (stats["submitted"], stats["rejected"], stats["completed"], stats["failed"]) == (4, 1, 3, 1)
+    assert stats["pending"] == 0
+    executor.shutdown()
+    print("✓ Backlog bounded; overflow runs in the caller and is counted")
+
+    brain = HeadyBrain(cache_dir=scratch_dir())
+    threads_before = threading.active_count()
+    for i in range(5):
+        brain.process_request(f"deploy service {i}", {"enable_caching": False, "use_lens": True})
+    assert threading.active_count() <= threads_before + brain.executor.max_workers
+    assert brain.get_system_awareness()["executor_stats"]["max_workers"] == brain.executor.max_workers
+    brain.close()
+    print(f"✓ Pipeline reuses one pool of {brain.executor.max_workers} workers")
+
+    return True
+
+
+class SlowLens:
+    """LENS stand-in whose snapshot blocks like a slow psutil sweep."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.finished = 0
+
+    def get_current_state(self):
+        time.sleep(self.delay)
+        self.finished += 1
+        return {"nodes_active": ["BRAIN"], "services": {"api": "healthy"}}
+
+
+def test_async_pipeline():
+    """Test aprocess_request stage deadlines without blocking the event loop."""
+    print("\n" + "="*80)
+    print("TESTING BRAIN ASYNC PIPELINE")
+    print("="*80 + "\n")
+
+    async def run(brain, config):
+        ticks = 0
+        done = asyncio.Event()
+
+        async def ticker():
+            nonlocal ticks
+            while not done.is_set():
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        tick_task = asyncio.create_task(ticker())
+        context = await brain.aprocess_request("deploy the application", config)
+        done.set()
+        await tick_task
+        return context, ticks
+
+    brain = HeadyBrain(lens=SlowLens(0.3), cache_dir=scratch_dir())
+    context, ticks = asyncio.run(run(brain, {"enable_caching": False}))
+    assert context.active_nodes == ["BRAIN"] and context.service_health == {"api": "healthy"}
+    assert ticks >= 10
+    print(f"✓ Blocking stages offloaded ({ticks} event-loop ticks meanwhile)")
+
+    context, _ = asyncio.run(run(brain, {"enable_caching": False,
+                                         "stage_deadlines": {"awareness": 0.05}}))
+    assert context.degraded == ("awareness",) and context.active_nodes == ["BRAIN"]
+    print("✓ Stage past its deadline falls back to its last-known-good result")
+
+    config = {"enable_caching": True, "use_lens": False}
+    first, _ = asyncio.run(run(brain, config))
+    second, _ = asyncio.run(run(brain, config))
+    assert not first.cache_hit and second.cache_hit
+    brain.close()
+    print("✓ Async pipeline shares the context cache")
+
+    return True
+
+
+def test_latency_budgets():
+    """Test request/stage latency budgets and degraded contexts."""
+    print("\n" + "="*80)
+    print("TESTING BRAIN LATENCY BUDGETS")
+    print("="*80 + "\n")
+
+    brain = HeadyBrain(lens=SlowLens(0.5), cache_dir=scratch_dir())
+    config = {"stage_deadlines": {"awareness": 0.1}}
+
+    context = brain.process_request("monitor system health", config)
+    assert brain.lens.finished == 0  # returned while the snapshot was still running
+    assert context.degraded == ("awareness",) and context.system_state == {}
+    assert brain.metrics["degraded_requests"] == 1
+    assert brain.metrics["stage_overruns"] == {"awareness": 1}
+    print("✓ Overrunning stage cut off at its budget, context marked degraded")
+
+    assert not brain.process_request("monitor system health", config).cache_hit
+    print("✓ Degraded contexts are not cached")
+
+    brain.lens = SlowLens(0.0)
+    healthy = brain.process_request("check services", {"enable_caching": False})
+    assert healthy.degraded == () and healthy.active_nodes == ["BRAIN"]
+    brain.lens = SlowLens(0.5)
+    stale = brain.process_request("check services", {"enable_caching": False,
+                                                     "stage_deadlines": {"awareness": 0.1}})
+    assert stale.degraded == ("awareness",) and stale.active_nodes == ["BRAIN"]
+    print("✓ Awareness falls back to its last-known-good snapshot")
+
+    brain.lens = SlowLens(0.5)
+    context = brain.process_request("check services", {"enable_caching": False,
+                                                       "request_deadline": 0.05})
+    assert brain.lens.finished == 0 and "awareness" in context.degraded
+    print("✓ Total request deadline bounds every stage")
+
+    overrun = {"enable_caching": False, "request_deadline": 0.2}
+    context = brain.process_request("check services", {**overrun, "enable_parallel_processing": False})
+    assert context.active_nodes == ["BRAIN"]
+    assert sorted(context.degraded) == ["analysis", "comparative", "plan"]
+    print("✓ Sequential mode skips stages once the request budget is spent")
+
+    brain.executor.shutdown()
+    brain.executor = BoundedExecutor(max_workers=1, queue_size=0)
+    release = threading.Event()
+    blocker = brain.executor.submit(release.wait)
+    context = brain.process_request("check services", overrun)
+    release.set()
+    blocker.result()
+    assert brain.executor.get_stats()["rejected"] == 1
+    assert sorted(context.degraded) == ["analysis", "comparative", "plan"]
+    brain.close()
+    print("✓ Stages run inline on a saturated pool keep the request budget")
+
+    return True
+
+
+def test_concept_matcher():
+    """Test the compiled concept/pattern vocabulary."""
+    print("\n" + "="*80)
+    print("TESTING BRAIN CONCEPT MATCHER")
+    print("="*80 + "\n")
+
+    matcher = PhraseMatcher(["deploy", "deployment", "ploy", "he", "she", "hers", "men"])
+    assert matcher.find("DEPLOYMENT for the ushers") == {
+        "deploy", "deployment", "ploy", "men", "he", "she", "hers"}
+    assert matcher.find("nothing relevant") == set() and PhraseMatcher([]).find("x") == set()
+    print("✓ Overlapping and nested phrases all reported in one pass")
+
+    vocab = [f"term{i:04d}x" for i in range(2000)] + ["a.b", "(c)"]
+    text = "use term0042x and term1999x with a.b but not axb"
+    assert PhraseMatcher(vocab).find(text) == {v for v in vocab if v in text}
+    print("✓ Large vocabulary matches the naive substring scan")
+
+    brain = HeadyBrain(cache_dir=scratch_dir())
+    brain.register_concepts(["Kubernetes"])
+    concepts = brain._identify_concepts("Deploy the API on kubernetes with monitoring", [])
+    assert {"api", "kubernetes", "monitoring"} <= set(concepts)
+    assert "deployment" not in concepts
+    patterns = {p["type"]: p["indicators"] for p in
+                brain._recognize_patterns("fix the deployment error", {})}
+    assert patterns == {"deployment_request": ["deploy", "deployment"],
+                        "troubleshooting_request": ["fix", "error"]}
+    assert brain._extract_keywords("the workflow and the nodes") in (
+        ["workflow", "nodes"], ["nodes", "workflow"])
+    brain.close()
+    print("✓ Brain concepts, patterns and keywords use the compiled vocabulary")
+
+    return True
+
+
+def test_stale_while_revalidate():
+    """Test stale cache hits with background refresh and the max-stale limit."""
+    print("\n" + "="*80)
+    print("TESTING BRAIN STALE-WHILE-REVALIDATE")
+    print("="*80 + "\n")
+
+    brain = HeadyBrain(lens=SlowLens(0.2), cache_dir=scratch_dir())
+    # 0.3s TTL with a 1s grace window
+    config = {"cache_ttl_minutes": 0.3 / 60, "cache_max_stale_minutes": 1.0 / 60}
+
+    assert not brain.process_request("check services", config).cache_hit
+    time.sleep(0.35)
+    stale = brain.process_request("check services", config)
+    assert stale.cache_hit and stale.stale
+    print("✓ Expired entry inside the grace window served immediately")
+
+    deadline = time.time() + 5
+    while brain.metrics["revalidations"] < 1 and time.time() < deadline:
+        time.sleep(0.02)
+    fresh = brain.process_request("check services", config)
+    assert fresh.cache_hit and not fresh.stale
+    assert brain.metrics["stale_hits"] == 1 and brain.metrics["revalidations"] == 1
+    print("✓ Background refresh replaced the stale entry")
+
+    time.sleep(1.4)
+    expired = brain.process_request("check services", config)
+    assert not expired.cache_hit and not expired.stale
+    assert brain.context_cache.lookup("missing", 60, 60) == (None, False)
+    print("✓ Entries past the max-stale limit are recomputed synchronously")
+
+    bounded = {**config, "stage_deadlines": {"awareness": 0.1}}
+    brain.lens = SlowLens(0.0)
+    assert not brain.process_request("check health", bounded).cache_hit
+    time.sleep(0.35)
+    brain.lens = SlowLens(0.5)
+    assert brain.process_request("check health", bounded).stale
+    deadline = time.time() + 5
+    while brain.metrics["revalidations"] < 2 and time.time() < deadline:
+        time.sleep(0.02)
+    assert brain.metrics["stage_overruns"] == {"awareness": 1}
+    assert brain.context_cache.lookup(brain._get_cache_key("check health", {
+        **brain.default_config, **bounded}), 0.3, 60)[1]
+    brain.close()
+    print("✓ Refreshes run under the request budget; degraded ones are not cached")
+
+    return True
+
+
+def test_structured_logging():
+    """Test queue-based, level-gated logging and per-stage timings."""
+    print("\n" + "="*80)
+    print("TESTING BRAIN LOGGING AND STAGE TIMINGS")
+    print("="*80 + "\n")
+
+    class Unformattable:
+        def __str__(self):
+            raise AssertionError("formatted while verbose output is off")
+
+    shared = logging.getLogger("HeadyBrain")
+    level = shared.level
+    brain = HeadyBrain(verbose=False, cache_dir=scratch_dir())
+    assert shared.propagate and not shared.handlers and shared.level == level
+    brain.logger.info("lazy %s", Unformattable())
+    output = io.StringIO()
+    with redirect_stdout(output):
+        brain.process_request("deploy the api", {"enable_caching": False})
+        brain.process_request("deploy the api", {"enable_caching": False,
+                                                 "enable_parallel_processing": False})
+    assert output.getvalue() == ""
+    print("✓ Quiet hot path: no stdout and no formatting when not verbose")
+
+    timings = brain.get_system_awareness()["stage_timings"]
+    assert set(timings) == {"analysis", "comparative", "plan"}  # no LENS or MEMORY attached
+    assert all(t["max"] >= t["average"] >= 0 for t in timings.values())
+    assert timings["analysis"]["count"] == timings["plan"]["count"] == 2
+    brain.close()
+    print("✓ Both pipeline modes record per-stage timings")
+
+    verbose = HeadyBrain(verbose=True, cache_dir=scratch_dir())
+    quiet = HeadyBrain(verbose=False, cache_dir=scratch_dir())
+    records = []
+    capture = logging.Handler()
+    capture.emit = records.append
+    logging.getLogger().addHandler(capture)
+    shared.setLevel(logging.INFO)
+    try:
+        verbose.logger.info("progress")
+        quiet.logger.info("hidden")
+        quiet.logger.warning("degraded")
+    finally:
+        shared.setLevel(level)
+        logging.getLogger().removeHandler(capture)
+    assert [r.getMessage() for r in records] == ["progress", "degraded"]
+    verbose.close()
+    quiet.close()
+    print("✓ Records propagate to host handlers; verbose=False quiets one instance")
+
+    logger = setup_logging(verbose=False)
+    assert any(isinstance(h, logging.handlers.QueueHandler) for h in logger.handlers)
+    assert logger.propagate and not logger.isEnabledFor(logging.INFO)
+    print("✓ setup_logging installs the queued stderr handler on request")
+
+    return True
+
+
+def test_process_batch():
+    """Test the batch API against per-request processing."""
+    print("\n" + "="*80)
+    print("TESTING BRAIN BATCH PROCESSING")
+    print("="*80 + "\n")
+
+    class CountingLens(SlowLens):
+        calls = 0
+
+        def get_current_state(self):
+            CountingLens.calls += 1
+            return super().get_current_state()
+
+    with tempfile.TemporaryDirectory() as root:
+        memory = HeadyMemory(root)
+        memory.store("docs", {"text": "deployment runbook for the api"}, tags=["deployment"])
+        memory.store("docs", {"text": "monitoring dashboards"}, tags=["monitoring"])
+        memory.set_preference("region", "eu")
+
+        keyword_sets = [["deployment"], ["monitoring", "dashboards"], []]
+        ids = lambda results: [[m["id"] for m in matches] for matches in results]
+        assert ids(memory.search_many(keyword_sets)) == ids(memory.search(k) for k in keyword_sets)
+        assert ids(memory.search_many(keyword_sets))[0] != []
+        print("✓ search_many matches per-query search")
+
+        brain = HeadyBrain(lens=CountingLens(0.0), memory=memory, cache_dir=scratch_dir())
+        config = {"enable_caching": False, "use_memory": True}
+        requests = ["deploy the api runbook", "check monitoring dashboards",
+                    "deploy the api runbook"]
+        contexts = brain.process_batch(requests, config)
+        assert [c.request for c in contexts] == requests
+        assert CountingLens.calls == 1
+        assert contexts[0] is not contexts[2] and contexts[0].concepts_identified == \
+            contexts[2].concepts_identified
+        print("✓ One awareness snapshot for the batch; duplicates computed once")
+
+        for request, context in zip(requests, contexts):
+            single = brain.process_request(request, {**config, "enable_parallel_processing": False})
+            assert sorted(single.concepts_identified) == sorted(context.concepts_identified)
+            assert context.user_preferences == {"region": "eu"}
+        assert brain.process_batch([]) == []
+        print("✓ Batch results match per-request processing")
+
+        contexts = brain.process_batch(requests[:2], {**config, "request_deadline": 0.0})
+        assert [c.degraded[:2] for c in contexts] == [("awareness", "recall")] * 2
+        assert [sorted(c.degraded[2:]) for c in contexts] == \
+            [["analysis", "comparative", "plan", "store"]] * 2
+        assert not any(c.relevant_memories for c in contexts)
+        print("✓ Shared and per-request stages are bounded by the request deadline")
+
+        class BrokenLens:
+            def get_current_state(self):
+                raise RuntimeError("lens offline")
+
+        brain.lens = BrokenLens()
+        contexts = brain.process_batch(requests[:2], config)
+        assert [c.degraded for c in contexts] == [("awareness",)] * 2
+        # Awareness falls back to the last-known-good snapshot, recall is unaffected
+        assert all(c.active_nodes == ["BRAIN"] and c.relevant_memories for c in contexts)
+        print("✓ A failing shared stage degrades the batch instead of aborting it")
+
+        optimized = HeadyBrainOptimized(memory=memory, cache_dir=scratch_dir())
+        assert optimized.process_request("deploy the api", config).comparative_analysis is None
+        memory.store_external_source("docs", {"title": "runbook"}, "https://example.com/runbook")
+        context = optimized.process_request("deploy the api", config)
+        assert len(context.external_sources) == 1
+        assert context.comparative_analysis.startswith("Analyzed 1 external sources")
+        assert brain.process_request("deploy the api", config).external_sources == []
+        optimized.close()
+        print("✓ External sources recalled where enable_external_sources is on")
+
+        brain.close()
+        memory.close()
+
+    return True
+
+
+def test_cache_serializer():
+    """Test the versioned, checksummed cache encoding."""
+    print("\n" + "="*80)
+    print("TESTING BRAIN CACHE SERIALIZER")
+    print("="*80 + "\n")
+
+    serializer = CacheSerializer()
+    entry = {"saved_at": 1.5, "context": {"plan": {"steps": [1, 2]}, "when": datetime(2026, 1, 1)}}
+    data = serializer.dumps(entry)
+    assert data[:3] == b"HBC"
+    assert serializer.loads(data) == {"saved_at": 1.5, "context": {
+        "plan": {"steps": [1, 2]}, "when": "2026-01-01 00:00:00"}}
+    assert CacheSerializer("json").loads(data) == serializer.loads(data)
+    print(f"✓ Round trip with {serializer.codec} codec; readers decode any codec")
+
+    for damaged in (data[:-1] + bytes([data[-1] ^ 1]), data[:5], b"\x80\x04pickle" + data):
+        try:
+            serializer.loads(damaged)
+            assert False, "damaged entry accepted"
+        except ValueError:
+            pass
+    print("✓ Corrupt, truncated and foreign data rejected")
+
+    brain = HeadyBrain(cache_dir=scratch_dir())
+    with tempfile.TemporaryDirectory() as root:
+        cache = ContextCache(Path(root))
+        key = brain._get_cache_key("serialized", {})
+        original = replace(make_context(brain, "serialized"), degraded=("plan",))
+        cache.put(key, original)
+        restored = ContextCache(Path(root)).get(key, 60)
+        assert restored == original
+        path = Path(root) / key[:2] / f"{key}.hbc"
+        path.write_bytes(path.read_bytes()[:-1] + b"x")
+        assert ContextCache(Path(root)).get(key, 60) is None
+
+        legacy = Path(root) / "legacy.pkl"
+        legacy.write_bytes(b"not loaded")
+        cache.clear()
+        assert not legacy.exists()
+    brain.close()
+    print("✓ Contexts survive a disk round trip; corrupt files are misses")
+
+    return True
+
+
+def test_routing_table():
+    """Test the compiled, cost-ordered concept-to-task routes."""
+    print("\n" + "="*80)
+    print("TESTING BRAIN ROUTING TABLE")
+    print("="*80 + "\n")
+
+    from types import SimpleNamespace
+    from HeadyRegistry import Node
+
+    registry = SimpleNamespace(nodes={
+        "OBSERVER": Node("OBSERVER", "The Natural Observer", "observer_daemon", trigger_on=["monitor"]),
+        "ATLAS": Node("ATLAS", "The Auto-Archivist", "auto_doc", trigger_on=["documentation"]),
+        "OCULUS": Node("OCULUS", "The Visualizer", "gource", trigger_on=["visualize"]),
+    })
+    conductor = SimpleNamespace(execution_stats={"node_latency": {}})
+    routing = RoutingTable(registry, conductor)
+
+    concepts = ["documentation", "deployment", "visualize", "monitoring", "unknown", "monitoring"]
+    tasks = routing.route(concepts)
+    assert [t["concept"] for t in tasks] == ["monitoring", "deployment", "documentation"]
+    assert tasks[0]["node"] == "OBSERVER" and tasks[0]["measured_latency"] is None
+    print("✓ Routes compiled from the task map, ordered by value per cost")
+
+    routing = RoutingTable(registry, conductor, invoke_triggers=True)
+    tasks = routing.route(concepts)
+    assert [t["concept"] for t in tasks] == ["monitoring", "visualize", "deployment", "documentation"]
+    assert tasks[1] == {**tasks[1], "action": "invoke", "target": "OCULUS"}
+    print("✓ Opt-in invoke routes for the remaining node triggers")
+
+    conductor.execution_stats["node_latency"].update({"OBSERVER": 4.0, "ATLAS": 0.1})
+    tasks = routing.route(concepts)
+    assert [t["concept"] for t in tasks] == ["documentation", "visualize", "deployment", "monitoring"]
+    assert tasks[0]["measured_latency"] == 0.1
+    print("✓ Measured node latency replaces the static estimate")
+
+    brain = HeadyBrain(registry=registry, conductor=conductor, cache_dir=scratch_dir())
+    assert [t["action"] for t in brain._assign_tasks("", ["security", "optimization"])] == \
+        ["audit", "optimize"]
+    brain.close()
+    print("✓ _assign_tasks uses the compiled table")
+
+    return True
+
+
+def test_stage_graph():
+    """Test the stage-graph engine shared by both brain variants."""
+    print("\n" + "="*80)
+    print("TESTING BRAIN STAGE GRAPH")
+    print("="*80 + "\n")
+
+    def build(left, right):
+        return StageGraph([
+            Stage("left", left, ("x",), ("a",)),
+            Stage("right", right, ("x",), ("b",)),
+            Stage("join", lambda a, b: (a + b, a * b), ("a", "b"), ("sum", "product")),
+            Stage("off", lambda x: 1 / 0, ("x",), ("skipped",), enabled=lambda config: config["on"]),
+        ])
+
+    # Each branch returns only once the other is running too (else the barrier breaks)
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet(value):
+        barrier.wait()
+        return value
+
+    execute = lambda stage, args: stage.fn(*args)
+    fallback = lambda stage, error: ("fallback", type(error).__name__)
+    executor = BoundedExecutor(max_workers=4)
+
+    values = build(meet, meet).run({"x": 3}, {"on": False}, execute, fallback, executor=executor)
+    assert (values["sum"], values["product"]) == (6, 9)
+    assert values["skipped"] == ("fallback", "NoneType")
+    print("✓ Independent stages overlap; dependents wait for their inputs")
+
+    graph = build(lambda x: x, lambda x: x)
+    values = graph.run({"x": 3}, {"on": True}, execute, fallback)
+    assert values["skipped"] == ("fallback", "ZeroDivisionError") and values["sum"] == 6
+    values = graph.run({"x": 3, "a": 10, "b": 1}, {"on": False}, execute, fallback)
+    assert values["sum"] == 11
+    print("✓ Inline mode, failed stages fall back, precomputed outputs skip stages")
+
+    release = threading.Event()
+    values = build(lambda x: release.wait(5) and x, lambda x: x).run(
+        {"x": 3}, {"on": False}, execute, fallback, executor=executor,
+        budget=lambda stage: 0.05 if stage.name == "left" else 1.0)
+    assert values["a"] == ("fallback", "TimeoutError") and values["b"] == 3
+    release.set()
+    executor.shutdown()
+    print("✓ Overrunning stages are cut off at their budget")
+
+    async def aexecute(stage, args):
+        return await asyncio.get_running_loop().run_in_executor(None, stage.fn, *args)
+    values = asyncio.run(graph.arun({"x": 2}, {"on": False}, aexecute, fallback))
+    assert values["product"] == 4
+    print("✓ Async runs resolve the same graph")
+
+    for stages in ([Stage("a", meet, ("x",), ("y",)), Stage("b", meet, ("x",), ("y",))],):
+        try:
+            StageGraph(stages)
+            assert False, "duplicate outputs accepted"
+        except ValueError:
+            pass
+    try:
+        StageGraph([Stage("a", meet, ("missing",), ("y",))]).run({}, {}, execute, fallback)
+        assert False, "unmet input accepted"
+    except ValueError:
+        pass
+    print("✓ Invalid graphs rejected")
+
+    brain = HeadyBrain(cache_dir=scratch_dir())
+    optimized = HeadyBrainOptimized(cache_dir=scratch_dir())
+    assert isinstance(optimized, HeadyBrain)
+    assert [s.name for s in optimized.stage_graph.stages] == [s.name for s in brain.stage_graph.stages]
+    config = {"enable_caching": False}
+    assert sorted(optimized.process_request("deploy the api", config).concepts_identified) == \
+        sorted(brain.process_request("deploy the api", config).concepts_identified)
+    assert optimized.get_performance_metrics()["requests_processed"] == 1
+    brain.close()
+    optimized.close()
+    print("✓ HeadyBrainOptimized is a configuration of the same pipeline")
+
+    return True
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_context_cache()
+        test_single_flight()
+        test_shared_executor()
+        test_async_pipeline()
+        test_latency_budgets()
+        test_concept_matcher()
+        test_stale_while_revalidate()
+        test_structured_logging()
+        test_process_batch()
+        test_cache_serializer()
+        test_routing_table()
+        test_stage_graph()
+
+        print("\n" + "="*80)
+        print("✓ ALL TESTS PASSED")
+        print("="*80 + "\n")
+
+        return 0
+
+    except Exception as e:
+        print(f"\n✗ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
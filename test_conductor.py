@@ -21,12 +21,13 @@ Test script for HeadyRegistry and HeadyConductor
 
 import sys
 import json
+import tempfile
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent / "HeadyAcademy"))
 
-from HeadyRegistry import HeadyRegistry
-from HeadyConductor import HeadyConductor
+from HeadyRegistry import HeadyRegistry, Node, Tool, Workflow
+from HeadyConductor import HeadyConductor, RoutingIndex
 
 
 def test_registry():
@@ -120,6 +121,80 @@ def test_orchestration():
     return True
 
 
+def test_routing_index():
+    """Test the inverted routing index and its incremental refresh."""
+    print("\n" + "="*80)
+    print("TESTING ROUTING INDEX")
+    print("="*80 + "\n")
+    
+    registry = HeadyRegistry()
+    registry.workflows, registry.nodes, registry.tools = {}, {}, {}
+    registry.services = {k: v for k, v in registry.services.items() if v.type == "database"}
+    registry.touch()
+    index = RoutingIndex(registry)
+    
+    registry.workflows["ship"] = Workflow("ship", "release the build to production", "ship.md", "/ship")
+    registry.nodes["OBSERVER"] = Node("OBSERVER", "The Natural Observer", "observer_daemon",
+                                      trigger_on=["monitor"])
+    registry.nodes["ATLAS"] = Node("ATLAS", "The Auto-Archivist", "auto_doc")
+    registry.tools["key_manager"] = Tool("key_manager", "Key_Manager.py", "security")
+    registry.touch()
+    assert index.sync() == 4 and index.sync() == 0
+    print("✓ Only new entities indexed on refresh")
+    
+    matches = index.match("Run /ship and monitoring; ask the auto-archivist to use the key manager "
+                          "for the postgres db")
+    assert matches["workflows"] == [("ship", 0.95)]
+    assert matches["nodes"] == [("OBSERVER", 0.85), ("ATLAS", 0.80)]
+    assert matches["tools"] == [("key_manager", 0.75)]
+    assert [name for name, _ in matches["services"]] == list(registry.services)
+    assert index.match("release to production")["workflows"] == [("ship", 0.75)]
+    assert index.match("release notes")["workflows"] == []
+    print("✓ Commands, triggers, roles, tools, services and descriptions routed")
+    
+    registry.nodes["OBSERVER"].trigger_on = ["observe"]
+    del registry.tools["key_manager"]
+    registry.touch()
+    assert index.sync() == 2
+    matches = index.match("monitor and observe with the key manager")
+    assert matches["nodes"] == [("OBSERVER", 0.85)] and matches["tools"] == []
+    print("✓ Changed and removed entities re-indexed incrementally")
+    
+    return True
+
+
+def test_node_latency_persistence():
+    """Test that measured node latency survives a conductor restart."""
+    print("\n" + "="*80)
+    print("TESTING NODE LATENCY PERSISTENCE")
+    print("="*80 + "\n")
+    
+    with tempfile.TemporaryDirectory() as root:
+        conductor = HeadyConductor(root)
+        conductor._record_latency("ATLAS", 0.5)
+        conductor._update_execution_stats({"success": True, "results": {}})
+        conductor._record_latency("ATLAS", 1.5)
+        conductor._update_execution_stats({"success": True, "results": {}})
+        conductor.brain.close()
+        conductor.memory.close()
+        
+        restarted = HeadyConductor(root)
+        assert restarted.execution_stats["node_latency"] == {"ATLAS": 0.7}
+        # Newest row wins even when an older one outranks it on relevance
+        restarted.memory.store("conductor_stats", {"node_latency": {"ATLAS": 3.0}},
+                               tags=["statistics"], source="conductor", relevance_score=0.1)
+        restarted.brain.close()
+        restarted.memory.close()
+        
+        latest = HeadyConductor(root)
+        assert latest.execution_stats["node_latency"] == {"ATLAS": 3.0}
+        latest.brain.close()
+        latest.memory.close()
+    print("✓ Latest persisted node latency seeds the restarted conductor")
+    
+    return True
+
+
 def main():
     """Run all tests."""
     print("\n" + "╔" + "="*78 + "╗")
@@ -130,6 +205,8 @@ def main():
         test_registry()
         test_conductor()
         test_orchestration()
+        test_routing_index()
+        test_node_latency_persistence()
         
         print("\n" + "="*80)
         print("✓ ALL TESTS PASSED")
@@ -0,0 +1,577 @@
+#!/usr/bin/env python3
+# HEADY_BRAND:BEGIN
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  █╗  █╗███████╗ █████╗ ██████╗ █╗   █╗                     ║
+# ║  █║  █║█╔════╝█╔══█╗█╔══█╗╚█╗ █╔╝                     ║
+# ║  ███████║█████╗  ███████║█║  █║ ╚████╔╝                      ║
+# ║  █╔══█║█╔══╝  █╔══█║█║  █║  ╚█╔╝                       ║
+# ║  █║  █║███████╗█║  █║██████╔╝   █║                        ║
+# ║  ╚═╝  ╚═╝╚══════╝╚═╝  ╚═╝╚═════╝    ╚═╝                        ║
+# ║                                                                  ║
+# ║  ∞ SACRED GEOMETRY ∞  Organic Systems · Breathing Interfaces    ║
+# ║  ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━  ║
+# ║  FILE: test_memory.py                                             ║
+# ║  LAYER: root                                                      ║
+# ╚══════════════════════════════════════════════════════════════════╝
+# HEADY_BRAND:END
+
+"""
+Test script for HeadyMemory
+"""
+
+import asyncio
+import io
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "HeadyAcademy"))
+
+from HeadyMemory import HeadyMemory, RetentionPolicy, intersect_postings, union_postings
+
+
+def test_batched_recall():
+    """Test batched recall and query over a single connection."""
+    print("\n" + "="*80)
+    print("TESTING MEMORY BATCHED RECALL")
+    print("="*80 + "\n")
+
+    with tempfile.TemporaryDirectory() as root:
+        memory = HeadyMemory(root)
+
+        ids = [
+            memory.store("concept", {"name": f"concept-{i}"}, tags=["batch", f"t{i % 3}"])
+            for i in range(25)
+        ]
+        print(f"✓ Stored {len(ids)} memories")
+
+        entries = memory.recall_many(ids + ["missing"])
+        assert set(entries) == set(ids)
+        assert all(e.access_count == 1 for e in entries.values())
+        print(f"✓ Batched recall returned {len(entries)} entries")
+
+        results = memory.query(tags=["batch"], limit=10)
+        assert len(results) == 10
+        assert all(r.access_count == 2 for r in results)
+        print(f"✓ Query returned {len(results)} entries")
+
+        assert memory.recall(ids[0]).content == {"name": "concept-0"}
+        assert memory.recall("missing") is None
+        print("✓ Single recall still supported")
+
+        memory.close()
+
+    return True
+
+
+def test_connection_pool():
+    """Test pooled connections under concurrent access."""
+    print("\n" + "="*80)
+    print("TESTING MEMORY CONNECTION POOL")
+    print("="*80 + "\n")
+
+    with tempfile.TemporaryDirectory() as root:
+        memory = HeadyMemory(root, pool_size=3)
+
+        with memory._connection() as conn:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+        print(f"✓ Journal mode: {mode}")
+
+        ids = [memory.store("task", {"n": i}, tags=["pool"]) for i in range(20)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            counts = list(executor.map(lambda mem_id: memory.recall(mem_id) is not None, ids * 5))
+        assert all(counts)
+
+        stats = memory.pool.stats()
+        assert stats["open_connections"] <= 3
+        print(f"✓ {len(counts)} concurrent recalls over {stats['open_connections']} connections")
+
+        memory.close()
+
+    return True
+
+
+def test_full_text_search():
+    """Test BM25-ranked full-text search over content and tags."""
+    print("\n" + "="*80)
+    print("TESTING MEMORY FULL-TEXT SEARCH")
+    print("="*80 + "\n")
+
+    with tempfile.TemporaryDirectory() as root:
+        memory = HeadyMemory(root)
+
+        deploy_id = memory.store("processing_context", {"request": "deploy the application"},
+                                 tags=["deployment"])
+        memory.store("processing_context", {"request": "monitor database health"},
+                     tags=["monitoring"])
+        memory.store("orchestration", {"request": "deploy and monitor the api"},
+                     tags=["deployment", "monitoring"])
+
+        results = memory.search(["deploying"], max_results=10)
+        assert {r["id"] for r in results} >= {deploy_id}
+        assert all("deploy" in r["content"]["request"] for r in results)
+        print(f"✓ Stemmed search returned {len(results)} results")
+
+        results = memory.search(["monitoring", "deployment"], max_results=1)
+        assert len(results) == 1 and results[0]["category"] == "orchestration"
+        print("✓ Best BM25 match ranked first")
+
+        results = memory.search(["health"], category="orchestration")
+        assert results == []
+        assert memory.search(['"', "OR"]) == []
+        print("✓ Category filter and query escaping")
+
+        memory.close()
+
+    return True
+
+
+def test_write_behind():
+    """Test write-behind batching, flush and durability on close."""
+    print("\n" + "="*80)
+    print("TESTING MEMORY WRITE-BEHIND")
+    print("="*80 + "\n")
+
+    def count_rows(memory):
+        with memory._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+
+    with tempfile.TemporaryDirectory() as root:
+        memory = HeadyMemory(root, write_behind=True, flush_interval=60, flush_batch_size=1000)
+
+        stats = {"count": 0}
+        first_id = memory.store("conductor_stats", stats, tags=["statistics"])
+        stats["count"] = 1  # caller mutates after store; queued snapshot must not change
+        for i in range(9):
+            memory.store("task", {"n": i}, tags=["queued"])
+        assert count_rows(memory) == 0
+        print("✓ Stores queued without committing")
+
+        assert memory.recall(first_id).content == {"count": 0}
+        assert count_rows(memory) == 10
+        print("✓ Reads flush queued stores first")
+
+        memory.store("task", {"n": "late"}, tags=["queued"])
+        assert memory.flush() == 1
+        assert memory.flush() == 0
+        memory.store("task", {"n": "shutdown"}, tags=["queued"])
+        memory.close()
+
+        reopened = HeadyMemory(root)
+        assert count_rows(reopened) == 12
+        print(f"✓ Close flushed pending writes ({count_rows(reopened)} rows)")
+        reopened.close()
+
+        searching = HeadyMemory(root, write_behind=True, flush_interval=60, flush_batch_size=1000)
+        searching.store("knowledge", {"topic": "kubernetes rollout"}, tags=["deploy"])
+        flushes = searching.write_behind_stats["flushes"]
+        searching.search(["unrelated"])
+        assert searching.write_behind_stats["flushes"] == flushes
+        assert len(searching._pending) == 1
+        print("✓ Searches no queued record could match skip the flush")
+
+        assert searching.search(["Kubernetes"])[0]["content"]["topic"] == "kubernetes rollout"
+        assert searching.search(["deploy"])
+        assert searching.write_behind_stats["flushes"] == flushes + 1
+        print("✓ Searches a queued record could match flush it first")
+        searching.close()
+
+        bounded = HeadyMemory(root, write_behind=True, flush_interval=60, flush_batch_size=1000,
+                              max_pending=5)
+        for i in range(12):
+            bounded.store("task", {"bounded": i})
+            assert len(bounded._pending) < 5
+        assert bounded.write_behind_stats["inline_flushes"] == 2
+        assert count_rows(bounded) == 23
+        print("✓ A full queue is flushed inline by the storing thread")
+        bounded.close()
+
+    return True
+
+
+def test_persisted_indexes():
+    """Test that indexes persist in SQLite and load lazily on reopen."""
+    print("\n" + "="*80)
+    print("TESTING MEMORY PERSISTED INDEXES")
+    print("="*80 + "\n")
+
+    with tempfile.TemporaryDirectory() as root:
+        memory = HeadyMemory(root)
+        ids = [memory.store("workflow", {"n": i}, tags=["persist", f"t{i % 2}"], source="cli")
+               for i in range(6)]
+        memory.close()
+
+        reopened = HeadyMemory(root)
+        assert not reopened.tag_index._postings
+        print("✓ No index rebuild at startup")
+
+        assert sorted(reopened.tag_index.get("persist")) == sorted(ids)
+        assert len(reopened.query(category="workflow", tags=["t0"], source="cli")) == 3
+        assert "missing" not in reopened.tag_index
+        print("✓ Postings loaded lazily from memory_index")
+
+        new_id = reopened.store("workflow", {"n": "new"}, tags=["persist"], source="cli")
+        assert new_id in reopened.tag_index.get("persist")
+        stats = reopened.get_statistics()
+        assert (stats["categories_indexed"], stats["tags_indexed"], stats["sources_indexed"]) == (1, 3, 1)
+        print("✓ Incremental maintenance on store")
+
+        reopened.close()
+
+        queued = HeadyMemory(root, write_behind=True, flush_interval=60)
+        reads = []
+        for index in (queued.category_index, queued.tag_index):
+            read_head = index._read_head
+            index._read_head = lambda key, n, read_head=read_head: reads.append(key) or read_head(key, n)
+        for i in range(20):
+            queued.store("audit", {"n": i}, tags=["queued"])
+        assert sorted(reads) == ["audit", "queued"] and queued.write_behind_stats["flushes"] == 0
+        head = queued.category_index.head("audit", 3)
+        assert queued.category_index.has_at_least("audit", 6)
+        queued.flush()
+        assert head == queued.category_index.get("audit")[:3]
+        print("✓ Store heuristics read each key's leading postings once, without flushing")
+        queued.close()
+
+    return True
+
+
+def test_posting_intersections():
+    """Test compact sorted postings and AND-combined query filters."""
+    print("\n" + "="*80)
+    print("TESTING MEMORY POSTING INTERSECTIONS")
+    print("="*80 + "\n")
+
+    small = array("q", [-5, 3, 40])
+    large = array("q", range(-10, 1000))
+    assert list(intersect_postings(small, large)) == [-5, 3, 40]
+    assert list(intersect_postings(array("q", [1, 2, 3]), array("q", [2, 3, 4]))) == [2, 3]
+    assert list(union_postings([array("q", [1, 3]), array("q", [2, 3]), array("q")])) == [1, 2, 3]
+    print("✓ Intersection and union helpers")
+
+    with tempfile.TemporaryDirectory() as root:
+        memory = HeadyMemory(root)
+        for i in range(12):
+            memory.store("task" if i % 2 else "concept", {"n": i},
+                         tags=[f"t{i % 3}"], source="brain" if i < 6 else "conductor")
+
+        postings = memory.tag_index.rowids("t0")
+        assert postings.typecode == "q" and list(postings) == sorted(postings)
+        assert len(memory.query(category="task", tags=["t0", "t1"], source="brain")) == 2
+        assert memory.query(category="missing", tags=["t0"]) == []
+        print("✓ Filters combine with AND over sorted postings")
+
+        memory.close()
+
+    return True
+
+
+def test_semantic_recall():
+    """Test the embedding-based semantic recall tier."""
+    print("\n" + "="*80)
+    print("TESTING MEMORY SEMANTIC RECALL")
+    print("="*80 + "\n")
+
+    with tempfile.TemporaryDirectory() as root:
+        legacy = HeadyMemory(root)
+        legacy_id = legacy.store("processing_context", {"request": "audit security vulnerabilities"},
+                                 tags=["security"])
+        legacy.close()
+
+        memory = HeadyMemory(root, semantic=True)
+        deploy_id = memory.store("processing_context",
+                                 {"request": "deploy the application to production"},
+                                 tags=["deployment"])
+        memory.store("processing_context", {"request": "monitor database health"},
+                     tags=["monitoring"])
+
+        results = memory.semantic_search("ship a production deployment of the app", max_results=1)
+        assert results[0]["id"] == deploy_id and results[0]["similarity"] > 0
+        print(f"✓ Paraphrase recalled (similarity {results[0]['similarity']:.2f})")
+
+        batch = memory.semantic_search_many(["security audit", "deployment"], max_results=1)
+        assert [hits[0]["id"] for hits in batch] == [legacy_id, deploy_id]
+        print("✓ Batched top-k, pre-existing memories backfilled")
+
+        assert memory.semantic_search("security audit", category="orchestration") == []
+        plain = HeadyMemory(root)
+        assert plain.semantic_search("anything") == []
+        plain.close()
+        print("✓ Category filter and disabled tier")
+
+        memory.close()
+
+    return True
+
+
+def test_retention_compaction():
+    """Test per-category retention policies and compaction."""
+    print("\n" + "="*80)
+    print("TESTING MEMORY RETENTION AND COMPACTION")
+    print("="*80 + "\n")
+
+    with tempfile.TemporaryDirectory() as root:
+        memory = HeadyMemory(root, semantic=True, retention={
+            "conductor_stats": RetentionPolicy(max_rows=3),
+            "processing_context": RetentionPolicy(ttl_days=1, keep_latest=1),
+        })
+        stats_ids = [memory.store("conductor_stats", {"n": i, "pad": "x" * 2000}, tags=["statistics"])
+                     for i in range(20)]
+        context_ids = [memory.store("processing_context", {"request": f"deploy {i}"}, tags=["deploy"])
+                       for i in range(4)]
+        concept_id = memory.store("concept", {"name": "kept"}, tags=["deploy"])
+
+        result = memory.compact()
+        assert result["deleted"] == {"conductor_stats": 17}
+        assert memory.recall(stats_ids[-1]) is not None and memory.recall(stats_ids[0]) is None
+        assert len(memory.tag_index.get("statistics")) == 3
+        print(f"✓ max_rows kept newest rows ({result['pages_vacuumed']} pages vacuumed)")
+
+        result = memory.compact(now=datetime.now() + timedelta(days=2))
+        assert result["deleted"] == {"processing_context": 3}
+        assert sorted(memory.tag_index.get("deploy")) == sorted([context_ids[-1], concept_id])
+        assert {r["id"] for r in memory.search(["deploy"])} == {context_ids[-1], concept_id}
+        assert len(memory.semantic_search("deploy", max_results=10)) == 5
+        print("✓ TTL expired rows with their index, full-text and vector entries")
+
+        stats = memory.get_statistics()
+        assert stats["total_memories"] == 5 and stats["compaction"]["runs"] == 2
+        memory.close()
+
+    with tempfile.TemporaryDirectory() as root:
+        memory = HeadyMemory(root)
+        memory.store("conductor_stats", {"n": 0}, tags=["statistics"])
+        assert memory.retention == {} and memory.compact()["rows_deleted"] == 0
+        assert len(memory.tag_index.get("statistics")) == 1
+        print("✓ Retention is opt-in: no policies, nothing deleted")
+
+        # Databases created before incremental vacuum are only rebuilt on request
+        with memory._connection() as conn:
+            conn.execute("PRAGMA auto_vacuum = NONE")
+            conn.execute("VACUUM")
+        assert memory.compact()["pages_vacuumed"] == 0
+        assert memory.enable_incremental_vacuum() and not memory.enable_incremental_vacuum()
+        print("✓ Legacy databases skip vacuum until explicitly migrated")
+        memory.close()
+
+    return True
+
+
+def test_payload_compression():
+    """Test compressed, deduplicated storage of large contents."""
+    print("\n" + "="*80)
+    print("TESTING MEMORY PAYLOAD COMPRESSION")
+    print("="*80 + "\n")
+
+    with tempfile.TemporaryDirectory() as root:
+        memory = HeadyMemory(root, retention={"orchestration": RetentionPolicy(max_rows=0)})
+        plan = {"steps": [{"step": i, "node": "HeadyConductor", "action": "execute workflow"}
+                          for i in range(40)]}
+        plan_id = memory.store("orchestration", plan, tags=["plan"])
+        copy_id = memory.store("learning_insights", plan, tags=["plan"])
+        small_id = memory.store("task", {"n": 1})
+
+        payloads = memory.get_statistics()["payloads"]
+        assert payloads["count"] == 1 and payloads["stored_bytes"] < payloads["bytes"]
+        print(f"✓ Identical payloads stored once ({payloads['bytes']} -> {payloads['stored_bytes']} bytes)")
+
+        entry = memory.recall(copy_id)
+        assert entry._encoded is not None
+        assert entry.content == plan and entry._encoded is None
+        assert memory.recall(small_id).content == {"n": 1}
+        assert memory.search(["workflow"])[0]["content"] == plan
+        print("✓ Content decoded lazily on access")
+
+        memory.compact()
+        assert memory.recall(plan_id) is None and memory.recall(copy_id).content == plan
+        assert memory.get_statistics()["payloads"]["count"] == 1
+        memory.retention["learning_insights"] = RetentionPolicy(max_rows=0)
+        memory.compact()
+        assert memory.get_statistics()["payloads"]["count"] == 0
+        print("✓ Compaction keeps shared payloads and drops orphans")
+
+        # Compaction starting right after a store found the payload must not drop it
+        memory.store("orchestration", plan, tags=["plan"])
+        write_payloads = memory._write_payloads
+        compactor = threading.Thread(target=memory.compact)
+
+        def racing_write_payloads(cursor, contents):
+            digests = write_payloads(cursor, contents)
+            compactor.start()
+            compactor.join(timeout=0.3)
+            return digests
+
+        memory._write_payloads = racing_write_payloads
+        racer_id = memory.store("task", plan)
+        memory._write_payloads = write_payloads
+        compactor.join()
+        assert memory.recall(racer_id).content == plan
+        assert memory.get_statistics()["payloads"]["count"] == 1
+        print("✓ Payload reuse and compaction are serialized by the write lock")
+
+        memory.close()
+
+    return True
+
+
+def test_query_planner():
+    """Test ordered top-N queries and keyset cursor pagination."""
+    print("\n" + "="*80)
+    print("TESTING MEMORY QUERY PLANNER")
+    print("="*80 + "\n")
+
+    with tempfile.TemporaryDirectory() as root:
+        memory = HeadyMemory(root)
+        for i in range(60):
+            memory.store("task", {"n": i}, tags=[f"t{i % 3}"], relevance_score=(i % 10) / 10)
+        best_id = memory.store("task", {"n": "best"}, tags=["t0"], relevance_score=1.9)
+        memory.close()
+
+        memory = HeadyMemory(root)
+        top = memory.query(category="task", tags=["t0", "t1"], limit=5)
+        keys = [(e.relevance_score, e.timestamp) for e in top]
+        assert top[0].id == best_id and keys == sorted(keys, reverse=True)
+        print("✓ True top-N by relevance from SQL")
+
+        memory.tag_index.rowids("t0")
+        memory.tag_index.rowids("t1")
+        memory.category_index.rowids("task")
+        assert [e.id for e in memory.query(category="task", tags=["t0", "t1"], limit=5)] == [e.id for e in top]
+        print("✓ Cached postings plan returns the same order")
+
+        page, cursor = memory.query_page(tags=["t2"], limit=7)
+        seen = [e.id for e in page]
+        while cursor:
+            page, cursor = memory.query_page(tags=["t2"], limit=7, cursor=cursor)
+            seen.extend(e.id for e in page)
+        assert len(seen) == len(set(seen)) == 20
+        assert [e.id for e in memory.iter_query(tags=["t2"], page_size=6)] == seen
+        print(f"✓ Keyset pagination streamed {len(seen)} entries")
+
+        try:
+            memory.query_page(cursor="not-a-cursor")
+            assert False, "invalid cursor accepted"
+        except ValueError:
+            print("✓ Invalid cursor rejected")
+
+        memory.close()
+
+    return True
+
+
+def test_change_feed():
+    """Test the change-feed sequence numbers and subscriptions."""
+    print("\n" + "="*80)
+    print("TESTING MEMORY CHANGE FEED")
+    print("="*80 + "\n")
+
+    with tempfile.TemporaryDirectory() as root:
+        memory = HeadyMemory(root, retention={"task": RetentionPolicy(max_rows=1)})
+        first_id = memory.store("task", {"n": 0})
+        start = memory.latest_seq()
+        assert start == 1
+        print(f"✓ Sequence number per write (latest {start})")
+
+        received = []
+        tail = threading.Thread(target=lambda: received.extend(
+            memory.subscribe(categories=["task"], timeout=1.0)))
+        tail.start()
+        time.sleep(0.1)
+        second_id = memory.store("task", {"n": 1})
+        memory.store("concept", {"n": 1})
+        memory.compact()
+        tail.join()
+        assert [(c["id"], c["op"]) for c in received] == [(second_id, "store"), (first_id, "delete")]
+        assert all(a["seq"] < b["seq"] for a, b in zip(received, received[1:]))
+        print("✓ Subscriber tailed new stores and deletes for its categories")
+
+        async def replay():
+            return [change async for change in memory.asubscribe(since_seq=0, timeout=0.1)]
+        assert [c["seq"] for c in asyncio.run(replay())] == list(range(1, memory.latest_seq() + 1))
+        print("✓ Async subscription replays from a sequence number")
+
+        memory.close()
+        reopened = HeadyMemory(root)
+        assert reopened.latest_seq() == 4
+        assert list(reopened.subscribe(since_seq=3, timeout=0.1)) == reopened.changes_since(3)
+        reopened.close()
+
+    return True
+
+
+def test_bulk_import_export():
+    """Test chunked bulk_store and streaming JSONL export/import."""
+    print("\n" + "="*80)
+    print("TESTING MEMORY BULK IMPORT/EXPORT")
+    print("="*80 + "\n")
+
+    with tempfile.TemporaryDirectory() as root:
+        memory = HeadyMemory(str(Path(root) / "source"))
+        records = ({"category": "task", "content": {"n": i}, "tags": [f"t{i % 4}"], "source": "seed",
+                    "relevance_score": 1.0 + (i % 5) / 10} for i in range(1000))
+        assert memory.bulk_store(records, chunk_size=128) == 1000
+        assert memory.bulk_store([{"category": "task", "content": {"n": 1}},
+                                  {"category": "task", "content": {"n": 1}}]) == 1
+        stored_id = memory.store("concept", {"name": "single"}, tags=["t0"])
+        assert memory.get_statistics()["total_memories"] == 1001
+        assert len(memory.tag_index.get("t0")) == 251
+        assert memory.search(["t3"], max_results=300)[0]["source"] == "seed"
+        print("✓ Bulk store in chunked transactions with index maintenance")
+
+        exported = list(memory.export_stream(tags=["t1"], page_size=100))
+        assert len(exported) == 250 and exported[0]["access_count"] == 0
+        buffer = io.StringIO()
+        assert memory.export_jsonl(buffer) == 1001
+        print("✓ Streaming export in keyset pages")
+
+        replica = HeadyMemory(str(Path(root) / "replica"))
+        buffer.seek(0)
+        assert replica.import_jsonl(buffer, chunk_size=300) == 1001
+        assert replica.recall(stored_id).content == {"name": "single"}
+        assert ([(e.id, e.relevance_score) for e in replica.query(tags=["t2"], limit=50)] ==
+                [(e.id, e.relevance_score) for e in memory.query(tags=["t2"], limit=50)])
+        print("✓ JSONL round trip preserves IDs and ordering")
+
+        memory.close()
+        replica.close()
+
+    return True
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_batched_recall()
+        test_connection_pool()
+        test_full_text_search()
+        test_write_behind()
+        test_persisted_indexes()
+        test_posting_intersections()
+        test_semantic_recall()
+        test_retention_compaction()
+        test_payload_compression()
+        test_query_planner()
+        test_change_feed()
+        test_bulk_import_export()
+
+        print("\n" + "="*80)
+        print("✓ ALL TESTS PASSED")
+        print("="*80 + "\n")
+
+        return 0
+
+    except Exception as e:
+        print(f"\n✗ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())